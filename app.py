@@ -1,13 +1,34 @@
+from io import StringIO
+
 import streamlit as st
 
-from src.const_params import quality
+from src.assets import serve_assets
+from src.cache import canonical_hash, html_cache, motion_cache
+from src.const_params import (
+    avail_colors,
+    compute_dtype,
+    max_quality,
+    payload_encoding,
+    sweep_quality,
+    sweep_tile,
+    tolerance,
+    viewport_size,
+)
 from src.controllers import DrawController
-from src.object_views import CircleView
+from src.metrics import instrumentation
+from src.object_views import CircleView, SweepView
 from src.orbit_views import OrbitView
+from src.shapes import Circle
+from src.store import trajectory_store
+from src.stream_view import StreamView
+from src.svg_export import SvgExporter
 
 # Set page configuration
 st.set_page_config(layout="wide")
 
+# Front-end assets served once for the iframes of all drawings
+assets_url = serve_assets()
+
 # Display header
 st.header("SPIROGRAPH")
 
@@ -24,28 +45,120 @@ with st.form(key="create-spirograph"):
     columns = st.columns(4)
     for i in range(orbit_view.number_of_circles):
         circle_view = CircleView(
-            i, columns, 1, max_radius=orbit_view.max_radius
+            i,
+            columns,
+            1,
+            max_radius=orbit_view.max_radius,
+            chainable=i > 0 and isinstance(orbit_view.orbit, Circle),
         )
         circle_view.show_inputs()
         circles.append(circle_view)
 
     submitted = st.form_submit_button("Show drawing")
 
+# Parameter sweep: thumbnails of a grid of circles rolling on the orbit, calculated at once
+with st.expander("Parameter sweep"):
+    with st.form(key="parameter-sweep"):
+        sweep_view = SweepView(orbit_view.max_radius)
+        sweep_view.show_inputs()
+        sweep_submitted = st.form_submit_button("Show sweep")
+
+    if sweep_submitted and not sweep_view.outer:
+        st.warning("Select at least one roll (inside or outside).")
+    elif sweep_submitted:
+        with instrumentation.render("show_sweep"):
+            sweep = sweep_view.submit(
+                orbit_view.orbit, sweep_quality, dtype=compute_dtype
+            )
+            sheet = sweep.contact_sheet(
+                avail_colors[sweep_view.color], tile=sweep_tile
+            )
+            image = sheet.to_png()
+        rows = ", ".join(
+            f"{'outside' if m.direction == 1 else 'inside'} {m.circle.radius:g}"
+            for m in sweep.motions
+        )
+        columns = ", ".join(f"{ratio:.2f}" for ratio in sweep.pen_ratios)
+        st.image(
+            image,
+            caption=f"Rows (roll and radius): {rows}. "
+            f"Columns (distance from center, part of radius): {columns}.",
+        )
+
 # When form submitted, generate motions and display drawing
 if submitted:
-    motions = []
-    for circle_view in circles:
-        motion = circle_view.submit(orbit_view.orbit, quality)
-        motions.append(motion)
-
-    draw_controller = DrawController(
-        orbit_view.orbit,
-        motions,
-        orbit_view.speed,
-        orbit_view.show_borders,
-        orbit_view.animate,
-        "src/html_views/plots.html",
-    )
-
-    html_file = draw_controller.submit_parameters()
-    st.components.v1.html(html_file, height=2000)
+    with instrumentation.render("show_drawing") as spans:
+        motions = []
+        # Circles rolling on the circle drawn before them (epicycle chains)
+        chain = []
+        for circle_view in circles:
+            if not circle_view.on_previous:
+                chain = []
+            motion = circle_view.submit(
+                orbit_view.orbit,
+                max_quality,
+                tolerance,
+                cache=motion_cache,
+                dtype=compute_dtype,
+                chain=chain,
+            )
+            motions.append(motion)
+            chain = chain + [circle_view]
+
+        draw_controller = DrawController(
+            orbit_view.orbit,
+            motions,
+            orbit_view.speed,
+            orbit_view.show_borders,
+            orbit_view.animate,
+            "src/html_views/plots.html",
+            encoding=payload_encoding,
+            resolution=viewport_size,
+            cache=html_cache,
+            render_mode=orbit_view.render_mode,
+            store=trajectory_store,
+            dtype=compute_dtype,
+            assets_url=assets_url,
+        )
+
+        # Drawings sent as equations or chunks are not calculated on the server at once
+        if orbit_view.render_mode not in ("parametric", "stream"):
+
+            def export_svg() -> str:
+                svg_file = StringIO()
+                SvgExporter(draw_controller).write(svg_file)
+                return svg_file.getvalue()
+
+            # Exported once for the same drawing, like its HTML view
+            svg = html_cache.get_or_create(
+                canonical_hash("svg", draw_controller.key()), export_svg
+            )
+            st.download_button(
+                "Download SVG",
+                data=svg,
+                file_name="spirograph.svg",
+                mime="image/svg+xml",
+            )
+
+        metrics_panel = st.empty()
+        drawing = st.empty()
+        if orbit_view.render_mode == "stream":
+            # Chunks are sent to one component as the page appends them (see StreamView)
+            html_file = None
+            with drawing.container():
+                StreamView().show(draw_controller.stream_html())
+        else:
+            html_file = draw_controller.submit_parameters()
+        # Motions compute their trajectories lazily, so measure them again after drawing
+        motion_cache.refresh()
+
+    # Debug panel with the measurements (when the SPIROGRAPH_METRICS environment variable is set)
+    if instrumentation.enabled:
+        with metrics_panel.container():
+            with st.expander("Render metrics"):
+                st.dataframe([span.to_dict() for span in spans])
+                st.code(instrumentation.to_prometheus())
+
+    if html_file is not None:
+        with drawing:
+            st.components.v1.html(html_file, height=2000)
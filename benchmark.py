@@ -0,0 +1,356 @@
+"""
+Benchmark the geometry and rendering pipeline without a browser.
+
+Every case of the matrix (orbit shape x number of circles x sampling x rolling direction
+x convergence of the rotation ratio) is run through the stages of a drawing:
+
+    parametric_equation - Shape.parametric_equation of the orbit with the case quality
+    rotations           - circle speeds and numbers of rotations of all motions
+    trajectory          - trajectories of all motions (DrawController.compute_motions)
+    circle_frames       - frames of the circle animations
+    html                - DrawController.submit_parameters (decimation, encoding and the template)
+
+For each stage the wall time (the best of --repeat runs), the peak memory allocated
+during the stage (tracemalloc, measured in a separate run) and the size of its output
+are recorded in a JSON file, so results of different commits can be compared.
+
+Usage:
+    python benchmark.py --output benchmark.json
+    python benchmark.py --cases "elipse-*" --output new.json --baseline benchmark.json --threshold 1.25
+
+With --baseline the exit code is 1 if any measurement of a case present in both files
+grew more than threshold times (differences below --min-seconds and --min-bytes are ignored as noise).
+"""
+
+import argparse
+import fnmatch
+import gc
+import itertools
+import json
+import platform
+import sys
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from src.const_params import (
+    max_quality,
+    payload_encoding,
+    tolerance,
+    viewport_size,
+)
+from src.controllers import DrawController
+from src.motions import CircleMotion
+from src.shapes import Circle, Elipse, arc_length_table
+
+TEMPLATE = str(Path(__file__).parent / "src" / "html_views" / "plots.html")
+
+ORBITS = {
+    "circle": lambda: Circle(96, 0x1F77B4),
+    "elipse": lambda: Elipse(48, 40, 0x1F77B4),
+}
+# Radii of the circles for which the drawing closes after a few rotations, many rotations
+# or does not close at all (irrational ratio, the best convergent below max_rot is used)
+RADII = {
+    "circle": {"fast": 24, "slow": 25, "never": 96 / np.e},
+    "elipse": {"fast": 10, "slow": 6, "never": 7 * np.sqrt(3)},
+}
+SAMPLINGS = {
+    "q5000": (5000, None),
+    "q50000": (50000, None),
+    "adaptive": (max_quality, tolerance),
+}
+CIRCLE_COUNTS = [1, 5, 10]
+DIRECTIONS = {"inner": False, "outer": True}
+
+
+def create_cases() -> dict[str, dict]:
+    """
+    Create the matrix of benchmark cases.
+
+    Returns:
+        dict[str, dict]: Dictionary of case names (e.g. "elipse-5x-q5000-outer-slow")
+        and parameters of the cases.
+    """
+    cases = {}
+    for orbit, count, sampling, direction, ratio in itertools.product(
+        ORBITS, CIRCLE_COUNTS, SAMPLINGS, DIRECTIONS, ["fast", "slow", "never"]
+    ):
+        name = f"{orbit}-{count}x-{sampling}-{direction}-{ratio}"
+        cases[name] = {
+            "orbit": orbit,
+            "count": count,
+            "sampling": sampling,
+            "direction": direction,
+            "ratio": ratio,
+        }
+    return cases
+
+
+def create_controller(case: dict, dtype: str) -> DrawController:
+    """
+    Create DrawController of the case with motions which are not calculated yet.
+
+    Parameters:
+        case (dict): Parameters of the case.
+        dtype (str): Type of the calculated coordinates.
+
+    Returns:
+        DrawController: Controller of the drawing.
+    """
+    orbit = ORBITS[case["orbit"]]()
+    radius = RADII[case["orbit"]][case["ratio"]]
+    quality, sampling_tolerance = SAMPLINGS[case["sampling"]]
+
+    motions = []
+    for i in range(case["count"]):
+        # Circles differ by the position of the pen (from the border towards the center)
+        motions.append(
+            CircleMotion(
+                orbit,
+                Circle(radius, 0xFF7F0E),
+                radius * i / case["count"],
+                DIRECTIONS[case["direction"]],
+                quality=quality,
+                tolerance=sampling_tolerance,
+                dtype=dtype,
+            )
+        )
+
+    return DrawController(
+        orbit,
+        motions,
+        200,
+        True,
+        False,
+        TEMPLATE,
+        encoding=payload_encoding,
+        resolution=viewport_size,
+        dtype=dtype,
+    )
+
+
+def nbytes(arrays) -> int:
+    """Total size (in bytes) of the arrays (nested in lists and tuples)."""
+    if isinstance(arrays, (list, tuple)):
+        return sum(nbytes(array) for array in arrays)
+    return np.asarray(arrays).nbytes
+
+
+def run_stages(case: dict, dtype: str, trace_memory: bool) -> dict[str, dict]:
+    """
+    Run all stages of the case on a new drawing.
+
+    Parameters:
+        case (dict): Parameters of the case.
+        dtype (str): Type of the calculated coordinates.
+        trace_memory (bool): Whether to measure peak memory of the stages with tracemalloc.
+
+    Returns:
+        dict[str, dict]: Dictionary of stage names and their measurements
+        (seconds, output_bytes and peak_bytes if memory is traced).
+    """
+    # Arc length tables are memoized across drawings, so start without them
+    arc_length_table.cache_clear()
+    controller = create_controller(case, dtype)
+    motions = controller.motions
+    quality = motions[0].quality
+
+    def trajectory() -> int:
+        controller.compute_motions()
+        return sum(m.nbytes for m in motions)
+
+    stages = {
+        "parametric_equation": lambda: nbytes(
+            controller.orbit.parametric_equation(
+                np.linspace(0, 2 * np.pi, quality), 1, 0
+            )
+        ),
+        "rotations": lambda: nbytes(
+            [(m.circle_speed, m.rotations) for m in motions]
+        ),
+        "trajectory": trajectory,
+        "circle_frames": lambda: nbytes(
+            [m.calculate_circle_movement() for m in motions]
+        ),
+        "html": lambda: len(controller.submit_parameters()),
+    }
+
+    results = {}
+    for name, stage in stages.items():
+        # Like timeit, collect garbage before the stage and not during it
+        gc.collect()
+        gc.disable()
+        if trace_memory:
+            tracemalloc.start()
+        start = perf_counter()
+        output_bytes = stage()
+        seconds = perf_counter() - start
+        gc.enable()
+        results[name] = {"seconds": seconds, "output_bytes": output_bytes}
+        if trace_memory:
+            results[name]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    results["rotations"]["value"] = [m.rotations for m in motions]
+    return results
+
+
+def run_case(case: dict, dtype: str, repeat: int) -> dict[str, dict]:
+    """
+    Benchmark the case: the best time of repeat runs and peak memory of one more traced run.
+
+    Parameters:
+        case (dict): Parameters of the case.
+        dtype (str): Type of the calculated coordinates.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        dict[str, dict]: Dictionary of stage names and their measurements.
+    """
+    runs = [run_stages(case, dtype, trace_memory=False) for _ in range(repeat)]
+    results = runs[0]
+    for name in results:
+        results[name]["seconds"] = min(run[name]["seconds"] for run in runs)
+
+    traced = run_stages(case, dtype, trace_memory=True)
+    for name in results:
+        results[name]["peak_bytes"] = traced[name]["peak_bytes"]
+    return results
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    threshold: float,
+    min_seconds: float,
+    min_bytes: int,
+) -> list[str]:
+    """
+    Find measurements which grew more than threshold times compared to the baseline.
+
+    Parameters:
+        results (dict): Results of the benchmark ("cases" of the JSON file).
+        baseline (dict): Baseline results.
+        threshold (float): Maximum accepted ratio of a measurement to the baseline.
+        min_seconds (float): Time differences below it are not reported.
+        min_bytes (int): Memory and output size differences below it are not reported.
+
+    Returns:
+        list[str]: Descriptions of the regressions.
+    """
+    regressions = []
+    for case, stages in results.items():
+        for stage, measurements in stages.items():
+            previous = baseline.get(case, {}).get(stage)
+            if previous is None:
+                continue
+            for metric in ("seconds", "peak_bytes", "output_bytes"):
+                old, new = previous.get(metric), measurements.get(metric)
+                if old is None or new is None or new <= old * threshold:
+                    continue
+                noise = min_seconds if metric == "seconds" else min_bytes
+                if new - old < noise:
+                    continue
+                regressions.append(
+                    f"{case} {stage} {metric}: {old:.6g} -> {new:.6g} "
+                    f"({new / max(old, 1e-12):.2f}x)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the geometry and rendering pipeline."
+    )
+    parser.add_argument(
+        "--output", default="benchmark.json", help="JSON file with results"
+    )
+    parser.add_argument(
+        "--cases",
+        default="*",
+        help='Pattern of the benchmarked case names (e.g. "circle-1x-*")',
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of timed runs"
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=["float64", "float32"],
+        default="float64",
+        help="Type of the calculated coordinates",
+    )
+    parser.add_argument(
+        "--baseline", help="JSON file with results to compare with"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Maximum accepted ratio of a measurement to the baseline",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.01,
+        help="Time regressions smaller than it are ignored",
+    )
+    parser.add_argument(
+        "--min-bytes",
+        type=int,
+        default=2**16,
+        help="Memory and output size regressions smaller than it are ignored",
+    )
+    args = parser.parse_args()
+
+    cases = {
+        name: case
+        for name, case in create_cases().items()
+        if fnmatch.fnmatch(name, args.cases)
+    }
+
+    results = {}
+    start = perf_counter()
+    for name, case in cases.items():
+        results[name] = run_case(case, args.dtype, args.repeat)
+        total = sum(stage["seconds"] for stage in results[name].values())
+        html_bytes = results[name]["html"]["output_bytes"]
+        peak = max(stage["peak_bytes"] for stage in results[name].values())
+        print(
+            f"{name:32} {total:8.3f} s {peak / 2**20:8.1f} MiB peak "
+            f"{html_bytes / 2**10:8.0f} KiB html"
+        )
+    print(f"Benchmarked {len(cases)} cases in {perf_counter() - start:.1f} s")
+
+    report = {
+        "environment": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "dtype": args.dtype,
+        },
+        "cases": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=1))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["cases"]
+        regressions = compare(
+            results,
+            baseline,
+            args.threshold,
+            args.min_seconds,
+            args.min_bytes,
+        )
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions above {args.threshold}x of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Render spirograph drawings without the Streamlit interface.
+
+Each line of the input file is a JSON drawing specification, e.g.:
+
+    {"name": "rose", "orbit": {"shape": "circle", "radius": 96},
+     "circles": [{"radius": 24, "pen_distance": 20, "outer": false, "color": "ORANGE"}]}
+
+Orbit shapes are "circle" (with "radius"), "elipse" (with "width" and "height") and "path"
+(closed outline with "points" - list of [x, y], "bezier" - list of cubic [[x, y] x 4] curves,
+or "file" - text file with x y in each line).
+Optional keys (with defaults): "orbit_color" ("BLUE"), "quality" (const_params.quality),
+"tolerance" (None - uniform sampling), "speed" (200 points per second), "animate" (false), "borders" (true),
+"render_mode" ("vector", see DrawController), "dtype" (const_params.compute_dtype, type of the calculated coordinates).
+Optional circle keys: "pen_distance" (radius), "outer" (false), "color" ("ORANGE"),
+"on_previous" (false, the circle rolls on the previous circle of the list, only on circle orbits).
+
+Usage:
+    python render.py specs.jsonl --output renders --formats html svg npz --workers 8
+
+HTML pages load Plotly.js from the vendor directory copied into the output directory.
+
+With --store DIR, trajectories are shared by the workers (and later runs) through
+an on-disk TrajectoryStore in DIR.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from src.assets import copy_assets
+from src.const_params import (
+    avail_colors,
+    compute_dtype,
+    quality,
+    trajectory_store_bytes,
+)
+from src.controllers import DrawController
+from src.epicycles import EpicycleMotion
+from src.motions import CircleMotion
+from src.shapes import Circle, Elipse, SampledPathShape, Shape
+from src.store import TrajectoryStore
+from src.svg_export import SvgExporter
+
+TEMPLATE = str(Path(__file__).parent / "src" / "html_views" / "plots.html")
+
+
+def create_orbit(spec: dict, color: int) -> Shape:
+    """
+    Create orbit from its specification.
+
+    Parameters:
+        spec (dict): Orbit specification ({"shape": "circle", "radius": ...}
+            or {"shape": "elipse", "width": ..., "height": ...}
+            or {"shape": "path", "points" | "bezier" | "file": ...}).
+        color (int): Color of the orbit.
+
+    Returns:
+        Shape: The orbit.
+    """
+    if spec["shape"] == "circle":
+        return Circle(spec["radius"], color)
+    if spec["shape"] == "elipse":
+        return Elipse(spec["width"] / 2, spec["height"] / 2, color)
+    if spec["shape"] == "path":
+        if "bezier" in spec:
+            return SampledPathShape.from_bezier(
+                np.array(spec["bezier"]), color
+            )
+        if "file" in spec:
+            return SampledPathShape(np.loadtxt(spec["file"]), color)
+        return SampledPathShape(np.array(spec["points"]), color)
+    raise ValueError(f"Unknown orbit shape {spec['shape']!r}")
+
+
+def create_controller(
+    spec: dict, store: TrajectoryStore | None = None
+) -> DrawController:
+    """
+    Create DrawController of the drawing from its specification.
+
+    Parameters:
+        spec (dict): Drawing specification (see the module docstring).
+        store (TrajectoryStore, optional): On-disk store of trajectories. Default is None.
+
+    Returns:
+        DrawController: Controller of the drawing.
+    """
+    orbit = create_orbit(
+        spec["orbit"], avail_colors[spec.get("orbit_color", "BLUE")]
+    )
+
+    motions = []
+    # Circles and directions of the epicycle chain ending with the current circle
+    chain = []
+    for circle_spec in spec["circles"]:
+        radius = circle_spec["radius"]
+        circle = Circle(
+            radius, avail_colors[circle_spec.get("color", "ORANGE")]
+        )
+        outer = circle_spec.get("outer", False)
+        if not circle_spec.get("on_previous", False):
+            chain = []
+        chain.append((circle, outer))
+        options = {
+            "quality": spec.get("quality", quality),
+            "tolerance": spec.get("tolerance"),
+            "dtype": spec.get("dtype", compute_dtype),
+        }
+        distance_to_border = radius - circle_spec.get("pen_distance", radius)
+        if len(chain) > 1:
+            motion = EpicycleMotion(
+                orbit,
+                [c for c, _ in chain],
+                [o for _, o in chain],
+                distance_to_border,
+                **options,
+            )
+        else:
+            motion = CircleMotion(
+                orbit, circle, distance_to_border, outer, **options
+            )
+        motions.append(motion)
+
+    return DrawController(
+        orbit,
+        motions,
+        spec.get("speed", 200),
+        spec.get("borders", True),
+        spec.get("animate", False),
+        TEMPLATE,
+        encoding="float32",
+        render_mode=spec.get("render_mode", "vector"),
+        store=store,
+        dtype=spec.get("dtype", compute_dtype),
+    )
+
+
+def write_npz(controller: DrawController, path: Path):
+    """
+    Write pen movements of the drawing as a compressed NumPy archive
+    with arrays x_0, y_0, x_1, y_1, ... (one pair for each circle).
+
+    Parameters:
+        controller (DrawController): Controller of the drawing.
+        path (Path): Path of the archive.
+    """
+    movements_x, movements_y = controller.get_points_movements()
+    arrays = {}
+    for i, (xs, ys) in enumerate(zip(movements_x, movements_y)):
+        arrays[f"x_{i}"] = xs
+        arrays[f"y_{i}"] = ys
+    np.savez_compressed(path, **arrays)
+
+
+def render(
+    job: tuple[int, dict, str, list[str], str | None],
+) -> tuple[str, float]:
+    """
+    Render one drawing into the requested formats.
+
+    Parameters:
+        job (tuple[int, dict, str, list[str], str | None]): Tuple containing the line number,
+            the drawing specification, the output directory, the formats and the directory
+            of the trajectory store (None if not used).
+
+    Returns:
+        tuple[str, float]: Tuple containing the name of the drawing and the rendering time (in seconds).
+    """
+    number, spec, output, formats, store_directory = job
+    start = perf_counter()
+
+    store = None
+    if store_directory is not None:
+        store = TrajectoryStore(store_directory, trajectory_store_bytes)
+
+    name = spec.get("name", f"drawing_{number}")
+    controller = create_controller(spec, store)
+    path = Path(output) / name
+    if "html" in formats and controller.render_mode == "stream":
+        # Written part by part, so the whole page is never held in memory
+        with open(path.with_suffix(".html"), "w") as file:
+            file.writelines(controller.stream_html())
+    elif "html" in formats:
+        path.with_suffix(".html").write_text(controller.submit_parameters())
+    if "svg" in formats:
+        with open(path.with_suffix(".svg"), "w") as file:
+            SvgExporter(controller).write(file)
+    if "npz" in formats:
+        write_npz(controller, path.with_suffix(".npz"))
+
+    return name, perf_counter() - start
+
+
+def render_job(
+    job: tuple[int, dict, str, list[str], str | None],
+) -> tuple[str, float, str | None]:
+    """
+    Render one drawing (see render), catching its errors, so one broken specification
+    does not stop the whole batch.
+
+    Parameters:
+        job (tuple[int, dict, str, list[str], str | None]): The job of render.
+
+    Returns:
+        tuple[str, float, str | None]: Tuple containing the name of the drawing, the rendering time
+            (in seconds) and the error message (None if the drawing was rendered).
+    """
+    number, spec = job[:2]
+    start = perf_counter()
+    try:
+        name, seconds = render(job)
+        return name, seconds, None
+    except Exception as error:
+        name = f"drawing_{number}"
+        if isinstance(spec, dict) and isinstance(spec.get("name"), str):
+            name = spec["name"]
+        return name, perf_counter() - start, f"{type(error).__name__}: {error}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render spirograph drawings from a JSONL file of specifications."
+    )
+    parser.add_argument("specs", help="JSONL file with drawing specifications")
+    parser.add_argument("--output", default="renders", help="Output directory")
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=["html", "svg", "npz"],
+        default=["html"],
+        help="Output formats",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Number of specifications sent to a worker at once "
+        "(default: about 4 chunks per worker)",
+    )
+    parser.add_argument(
+        "--store",
+        default=None,
+        help="Directory of the on-disk trajectory store shared by the workers",
+    )
+    args = parser.parse_args()
+
+    with open(args.specs) as file:
+        specs = [json.loads(line) for line in file if line.strip()]
+    Path(args.output).mkdir(parents=True, exist_ok=True)
+    if "html" in args.formats:
+        # Pages load the vendored assets from the output directory (they work offline)
+        copy_assets(args.output)
+
+    chunksize = args.chunksize or max(1, len(specs) // (4 * args.workers))
+    jobs = [
+        (number, spec, args.output, args.formats, args.store)
+        for number, spec in enumerate(specs)
+    ]
+
+    start = perf_counter()
+    failures = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for name, seconds, error in executor.map(
+            render_job, jobs, chunksize=chunksize
+        ):
+            if error is None:
+                print(f"{name}: {seconds:.3f} s")
+            else:
+                print(f"{name}: failed")
+                failures.append((name, error))
+    elapsed = perf_counter() - start
+
+    rendered = len(specs) - len(failures)
+    print(
+        f"Rendered {rendered} drawings in {elapsed:.2f} s "
+        f"({rendered / elapsed:.1f} drawings/s, {args.workers} workers)"
+    )
+    if failures:
+        print(f"{len(failures)} of {len(specs)} drawings failed:")
+        for name, error in failures:
+            print(f"  {name}: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
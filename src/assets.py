@@ -0,0 +1,59 @@
+import shutil
+from pathlib import Path
+
+# Front-end assets of the HTML views, vendored with their versions in the file names,
+# so pages work offline and browsers may cache them for good
+vendor_directory = Path(__file__).parent / "html_views" / "vendor"
+plotly_version = "2.35.2"
+plotly_file = f"plotly-{plotly_version}.min.js"
+
+
+def plotly_url(assets_url: str) -> str:
+    """
+    Get URL of Plotly.js.
+
+    Parameters:
+        assets_url (str): URL of the directory with the vendored assets.
+
+    Returns:
+        str: URL of the vendored Plotly.js.
+    """
+    return f"{assets_url}/{plotly_file}"
+
+
+def serve_assets(name: str = "vendor") -> str:
+    """
+    Serve the vendored assets by the Streamlit server.
+
+    The directory is declared as a component, so its files are served once per browser
+    (with JavaScript content type and public caching) to the iframes of all drawings.
+    App static serving sends scripts as text/plain, which browsers do not execute.
+
+    Parameters:
+        name (str, optional): Name of the component. Default is "vendor".
+
+    Returns:
+        str: URL of the assets directory (relative to the app page, which is also the base of the iframes).
+    """
+    import streamlit.components.v1 as components
+
+    components.declare_component(name, path=str(vendor_directory))
+    return f"component/{__name__}.{name}"
+
+
+def copy_assets(directory: str | Path) -> str:
+    """
+    Copy the vendored assets next to HTML files saved to the directory (e.g. by render.py).
+
+    Parameters:
+        directory (str or Path): Output directory of the HTML files.
+
+    Returns:
+        str: URL of the assets directory relative to the HTML files.
+    """
+    target = Path(directory) / "vendor"
+    target.mkdir(parents=True, exist_ok=True)
+    for asset in vendor_directory.iterdir():
+        if not (target / asset.name).exists():
+            shutil.copyfile(asset, target / asset.name)
+    return "vendor"
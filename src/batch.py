@@ -0,0 +1,131 @@
+import numpy as np
+
+from src.motions import CircleMotion
+from src.shapes import Circle, Shape
+
+
+class SpirographBatch:
+    """Calculates trajectories of all circles rolling on the same orbit in one NumPy pass."""
+
+    def __init__(self, orbit: Shape, motions: list[CircleMotion]):
+        """
+        Initialize SpirographBatch object.
+
+        Parameters:
+            orbit (Shape): Orbit shared by the motions.
+            motions (list[CircleMotion]): Motions of the circles rolling on the orbit.
+        """
+        if any(m.orbit.key() != orbit.key() for m in motions):
+            raise ValueError("All motions of the batch must share the orbit")
+        if len({m.dtype for m in motions}) > 1:
+            raise ValueError("All motions of the batch must share the dtype")
+
+        self.orbit = orbit
+        self.motions = motions
+
+    def calculate_thetas(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate time parameters of all motions stacked into one array.
+        Motions with fewer points are padded with their last time parameter.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Tuple containing (n_circles, samples) array of time parameters
+            and number of points of each motion.
+        """
+        qualities = {m.quality for m in self.motions}
+        if len(qualities) == 1 and all(
+            m.tolerance is None for m in self.motions
+        ):
+            rotations = np.array([m.rotations for m in self.motions])
+            samples = np.linspace(0, 1, qualities.pop())
+            thetas = np.outer(rotations * 2 * np.pi, samples)
+            return thetas, np.full(len(self.motions), len(samples))
+
+        rows = [m.calculate_thetas() for m in self.motions]
+        lengths = np.array([len(row) for row in rows])
+        thetas = np.stack(
+            [
+                np.pad(row, (0, lengths.max() - len(row)), "edge")
+                for row in rows
+            ]
+        )
+        return thetas, lengths
+
+    def compute(self):
+        """
+        Calculate trajectories of all motions.
+
+        Positions of the circle centers are calculated with one call of the orbit parametric_equation
+        and positions of the pens with one call of the circle parametric_equation
+        for the whole (n_circles, samples) array. Results are stored in x, y, x_center, y_center
+        and lengths attributes, and copies of the rows of the arrays are passed to the motions as their trajectories.
+        """
+        self.x = self.y = self.x_center = self.y_center = np.empty((0, 0))
+        self.lengths = np.empty(0, dtype=int)
+        if not self.motions:
+            return
+
+        thetas, self.lengths = self.calculate_thetas()
+
+        def column(values):
+            return np.array(values, dtype=float)[:, None]
+
+        radius = column([m.circle.radius for m in self.motions])
+        direction = column([m.direction for m in self.motions])
+        distance = column([m.distance_to_border for m in self.motions])
+        circle_speed = column([m.circle_speed for m in self.motions])
+        orbit_speed = column([m.orbit_speed for m in self.motions])
+
+        dtype = self.motions[0].dtype
+        self.x_center, self.y_center = self.orbit.parametric_equation(
+            thetas, orbit_speed, direction * radius, dtype=dtype
+        )
+        circles = Circle(radius, color=None)
+        self.x, self.y = circles.parametric_equation(
+            thetas, circle_speed, -distance, dtype=dtype
+        )
+        self.x += self.x_center
+        self.y += self.y_center
+
+        for i, m in enumerate(self.motions):
+            n = self.lengths[i]
+            # Copies of the rows, so cached motions do not keep the whole batch alive
+            # (and their nbytes is the memory they hold)
+            m.set_stage(
+                "trajectory",
+                tuple(
+                    array[i, :n].copy()
+                    for array in (self.x, self.y, self.x_center, self.y_center)
+                ),
+            )
+
+
+def stack_trajectories(
+    motions: list[CircleMotion],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Stack trajectories of the motions into (n_circles, samples) arrays like the ones of SpirographBatch.
+    Motions with fewer points are padded with their last point.
+
+    Parameters:
+        motions (list[CircleMotion]): Motions (their trajectories are calculated if not cached).
+
+    Returns:
+        tuple: Tuple containing x, y, x_center and y_center arrays of the pens and the circle centers
+        and number of points of each motion.
+    """
+    lengths = np.array([len(m.x) for m in motions], dtype=int)
+    if not motions:
+        return (*(np.empty((0, 0)),) * 4, lengths)
+
+    samples = lengths.max()
+    arrays = tuple(
+        np.stack(
+            [
+                np.pad(trajectory, (0, samples - len(trajectory)), "edge")
+                for trajectory in trajectories
+            ]
+        )
+        for trajectories in zip(*(m.trajectory for m in motions))
+    )
+    return (*arrays, lengths)
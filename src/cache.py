@@ -0,0 +1,147 @@
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable
+
+from src.const_params import html_cache_bytes, motion_cache_bytes
+
+
+def canonical_hash(*parts) -> str:
+    """
+    Calculate hash of the parameters which does not depend on their formatting
+    (e.g. 96 and 96.0 give the same hash).
+
+    Parameters:
+        parts: JSON serializable parameters (numbers, strings, booleans, None, lists and tuples of them).
+
+    Returns:
+        str: Hexadecimal SHA-256 digest of the parameters.
+    """
+
+    def normalize(value):
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        if isinstance(value, bool) or value is None or isinstance(value, str):
+            return value
+        return float(value)
+
+    encoded = json.dumps(normalize(parts), separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class RenderCache:
+    """Thread-safe LRU cache bounded by the total size (in bytes) of stored values."""
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int]):
+        """
+        Initialize RenderCache object.
+
+        Parameters:
+            max_bytes (int): Maximum total size of stored values.
+            sizeof (Callable[[Any], int]): Function returning size (in bytes) of a value.
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def get(self, key: str) -> Any | None:
+        """
+        Get value stored under the key and mark it as recently used.
+
+        Parameters:
+            key (str): Key of the value.
+
+        Returns:
+            Any | None: Stored value or None if the key is missing.
+        """
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key: str, value: Any):
+        """
+        Store value under the key and evict least recently used values above the size limit.
+
+        Parameters:
+            key (str): Key of the value.
+            value (Any): Value to store.
+        """
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            self.measure(key)
+            self.evict()
+
+    def get_or_create(self, key: str, create: Callable[[], Any]) -> Any:
+        """
+        Get value stored under the key or create and store it if it is missing.
+
+        Parameters:
+            key (str): Key of the value.
+            create (Callable[[], Any]): Function creating the value.
+
+        Returns:
+            Any: Stored or created value.
+        """
+        value = self.get(key)
+        if value is None:
+            value = create()
+            self.put(key, value)
+        return value
+
+    def refresh(self):
+        """
+        Measure again sizes of all values (e.g. lazily computed ones) and evict values above the size limit.
+        """
+        with self.lock:
+            for key in self.entries:
+                self.measure(key)
+            self.evict()
+
+    def measure(self, key: str):
+        """
+        Update size of the value stored under the key. Requires the lock.
+        """
+        self.size -= self.sizes.get(key, 0)
+        self.sizes[key] = self.sizeof(self.entries[key])
+        self.size += self.sizes[key]
+
+    def evict(self):
+        """
+        Evict least recently used values until the size limit is met. Requires the lock.
+        The most recently used value is kept even if it exceeds the limit on its own.
+        """
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            key, _ = self.entries.popitem(last=False)
+            self.size -= self.sizes.pop(key)
+
+    def stats(self) -> dict:
+        """
+        Get statistics of the cache.
+
+        Returns:
+            dict: Dictionary with number of entries, total size (in bytes), hits and misses.
+        """
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Caches shared by all sessions of the app (in one process)
+motion_cache = RenderCache(motion_cache_bytes, sizeof=lambda m: m.nbytes)
+html_cache = RenderCache(html_cache_bytes, sizeof=len)
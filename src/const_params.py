@@ -14,3 +14,37 @@ avail_colors = {
 
 # Quality of drawing (number of generated points)
 quality = 5000
+
+# Encoding of coordinates sent to the HTML view ("text", "float32" or "int16")
+payload_encoding = "float32"
+
+# Type of the calculated coordinates ("float32" is enough for the screen and halves the memory)
+compute_dtype = "float32"
+
+# Width (in pixels) of the plot used to convert screen-space tolerances into drawing units
+viewport_size = 1000
+
+# Maximum distance (in pixels) between the drawn polyline and the exact curve
+tolerance = 0.5
+
+# Maximum number of generated points when points are placed adaptively
+max_quality = 50000
+
+# Maximum number of points of each drawing of a parameter sweep and size (in pixels) of its thumbnails
+sweep_quality = 10000
+sweep_tile = 96
+# Maximum number of drawings of a parameter sweep (memory of the sweep grows with it)
+sweep_max_drawings = 400
+
+# Maximum total size (in bytes) of cached motions and rendered HTML views (shared by all sessions)
+motion_cache_bytes = 256 * 2**20
+html_cache_bytes = 64 * 2**20
+
+# Maximum total size (in bytes) of trajectories stored on disk (shared by all processes)
+trajectory_store_bytes = 1024 * 2**20
+
+# Maximum number of circles rolling on the orbit
+max_number_of_circles = 10
+
+# Maximum level of detail of zoomed drawings (level k has 2^k times more points than the full view)
+max_lod_level = 10
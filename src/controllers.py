@@ -1,9 +1,22 @@
-from pathlib import Path
+import json
+from base64 import b64encode
+from itertools import zip_longest
+from typing import Iterator
 
 import numpy as np
 
+from src.assets import plotly_url
+from src.batch import SpirographBatch, stack_trajectories
+from src.cache import RenderCache, canonical_hash
+from src.const_params import max_lod_level, viewport_size
+from src.decimation import PixelGridDecimator
+from src.metrics import instrumentation, instrumented
 from src.motions import CircleMotion
+from src.payloads import Int16Encoder, PayloadEncoder, encoders
+from src.raster import Rasterizer
 from src.shapes import Shape
+from src.store import TrajectoryStore
+from src.templates import load_template
 
 
 class DrawController:
@@ -17,6 +30,13 @@ class DrawController:
         show_borders: bool,
         animate: bool,
         html_file: str,
+        encoding: str = "text",
+        resolution: int | None = None,
+        cache: RenderCache | None = None,
+        render_mode: str = "vector",
+        store: TrajectoryStore | None = None,
+        dtype: np.dtype = np.float64,
+        assets_url: str = "vendor",
     ):
         """
         Initialize DrawController object.
@@ -24,69 +44,200 @@ class DrawController:
         Parameters:
             orbit (Shape): Orbit object representing the spirograph orbit.
             motions (List[CircleMotion]): List of CircleMotion objects representing the movements of circles.
-            drawing_speed (int): Speed of drawing.
+            drawing_speed (int): Speed of the animation in points per second.
             show_borders (bool): Boolean indicating whether to show orbit borders.
             animate (bool): Boolean indicating whether to animate the drawing.
-            html_file (str): Path to the HTML file template.
+            html_file (str): Path to the HTML file template (parsed once per process, see load_template).
+            encoding (str, optional): Encoding of the coordinates in the HTML file:
+                "text" (decimal lists), "float32" (base64 float32 buffers)
+                or "int16" (base64 int16 buffers quantized to the plot ranges). Default is "text".
+            resolution (int, optional): Number of pixels along the longer side of the plot.
+                If given, consecutive points falling into the same pixel are dropped before serialization.
+                Default is None (no decimation).
+            cache (RenderCache, optional): Cache of prepared HTML files. Default is None.
+            render_mode (str, optional): "vector" (pen movements are drawn by the browser),
+                "raster" (not animated drawings are sent as a PNG image)
+                or "parametric" (only parameters of the motions are sent and the browser
+                evaluates their parametric equations) or "stream" (pen movements are sent in chunks
+                appended by the browser as they arrive, see stream_html; not animated). Default is "vector".
+            store (TrajectoryStore, optional): On-disk store of trajectories. If given, trajectories
+                are loaded from it instead of calculated, and calculated ones are saved. Default is None.
+            dtype (np.dtype, optional): Type of the coordinates of the drawing (the borders and
+                the motions, which must be created with the same dtype). Default is np.float64.
+            assets_url (str, optional): URL of the vendored front-end assets loaded by the page
+                (see serve_assets and copy_assets). Default is "vendor" (directory next to the page).
         """
+        if render_mode not in ("vector", "raster", "parametric", "stream"):
+            raise ValueError(f"Unknown render mode {render_mode!r}")
+        if encoding not in encoders:
+            raise ValueError(
+                f"Unknown encoding {encoding!r}, available: {list(encoders)}"
+            )
+        if any(m.dtype != np.dtype(dtype) for m in motions):
+            raise ValueError(f"All motions must be calculated as {dtype}")
+
         self.orbit = orbit
         self.motions = motions
         self.drawing_speed = drawing_speed
         self.show_borders = show_borders
         self.animate = animate
-        self.html_file = Path(html_file).read_text()
+        self.template = load_template(html_file)
+        self.encoding = encoding
+        self.resolution = resolution
+        self.cache = cache
+        self.render_mode = render_mode
+        self.store = store
+        self.dtype = np.dtype(dtype)
+        self.assets_url = assets_url
+        self.decimation_report = None
 
-    def get_borders(self) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    @instrumented("controller.get_borders")
+    def get_borders(self) -> tuple[np.ndarray, np.ndarray]:
         """
         Get borders of the orbit.
 
         Returns:
-            tuple[list[np.ndarray], list[np.ndarray]]: Tuple containing list of x and list of y coordinates of the orbit's borders.
+            tuple[np.ndarray, np.ndarray]: Tuple containing x and y coordinates of the orbit's borders.
         """
         if self.show_borders:
-            xs, ys = self.orbit.get_borders()
-            return list(xs), list(ys)
+            return self.orbit.get_borders(dtype=self.dtype)
         else:
-            return [], []
+            return np.empty(0, dtype=self.dtype), np.empty(0, dtype=self.dtype)
 
+    @instrumented("controller.get_circles_animations")
     def get_circles_animations(
-        self,
-    ) -> tuple[list[list[list[float]]], list[list[list[float]]]]:
+        self, kept: tuple[np.ndarray, ...] | None = None
+    ) -> tuple[np.ndarray, list[float]]:
         """
         Get orbiting circles animations.
 
+        Parameters:
+            kept (tuple[np.ndarray, ...], optional): x, y, x_center and y_center of the points kept
+                for all circles, concatenated (see decimate_movements). Default is None (all points).
+
         Returns:
-            tuple[list[list[list[float]]], list[list[list[float]]]]:
-                Tuple containing lists of animations of each orbiting circle.
-                Each animation is a list of list[floats] - each lists[floats] represents position in time of orbiting circle.
+            tuple[np.ndarray, list[float]]:
+                Tuple containing animations of all orbiting circles concatenated into one (n, 3) array
+                and radii of the drawn circles. Each row represents center and phase in time
+                of orbiting circle (see CircleMotion.calculate_circle_frames).
         """
-        circles_xs, circles_ys = [], []
-        for m in self.motions:
-            xs, ys = m.calculate_circle_movement()
-            xs = list(map(list, xs))
-            ys = list(map(list, ys))
-            circles_xs.append(xs)
-            circles_ys.append(ys)
-        return circles_xs, circles_ys
+        radii = [
+            float(m.circle.radius - m.distance_to_border) for m in self.motions
+        ]
+        if kept is not None:
+            return CircleMotion.calculate_circle_frames(*kept), radii
+        # Frames of all points are cached by the motions
+        animations = [m.calculate_circle_movement() for m in self.motions]
+        if not animations:
+            return np.empty((0, 3), dtype=self.dtype), radii
+        return np.concatenate(animations), radii
+
+    def compute_motions(
+        self,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calculate trajectories of all motions on the orbit which are not cached yet
+        (in memory or in the store) in one SpirographBatch pass (motions which are not batched one by one).
+
+        Returns:
+            tuple: Tuple containing trajectories of all motions stacked into (n_circles, samples)
+            x, y, x_center and y_center arrays and number of points of each motion (see stack_trajectories).
+            Arrays of the batch are returned as they are when it calculated all motions.
+        """
+        pending = [
+            m
+            for m in self.motions
+            if not m.has_stage("trajectory")
+            and m.orbit.key() == self.orbit.key()
+        ]
+        if self.store is not None:
+            pending = [m for m in pending if not self.store.load(m)]
+
+        with instrumentation.span("controller.compute_motions") as span:
+            batch = SpirographBatch(
+                self.orbit, [m for m in pending if m.batched]
+            )
+            batch.compute()
+            for m in pending:
+                # Motions which are not batched (e.g. EpicycleMotion) are calculated one by one
+                m.trajectory
+            span.bytes = sum(m.nbytes for m in pending)
+
+        if self.store is not None:
+            for m in pending:
+                self.store.save(m)
 
+        if len(batch.motions) == len(self.motions):
+            return (
+                batch.x,
+                batch.y,
+                batch.x_center,
+                batch.y_center,
+                batch.lengths,
+            )
+        return stack_trajectories(self.motions)
+
+    @instrumented("controller.get_points_movements")
     def get_points_movements(
         self,
-    ) -> tuple[list[list[float]], list[list[float]]]:
+    ) -> tuple[list[np.ndarray], list[np.ndarray]]:
         """
         Get point (drawing pen) animations.
 
         Returns:
-            tuple[list[list[float]], list[list[float]]]:
+            tuple[list[np.ndarray], list[np.ndarray]]:
                 Tuple containing lists of animations of each pen in orbiting circle.
-                Each animation is a list[floats] - lists[floats] represents subsequent positions in time of pen in orbiting circle.
+                Each animation is an array - it represents subsequent positions in time of pen in orbiting circle.
         """
-        movements_x, movements_y = [], []
-        for m in self.motions:
-            xs, ys = m.calculate_point_movement()
-            movements_x.append(list(xs))
-            movements_y.append(list(ys))
+        x, y, _, _, lengths = self.compute_motions()
+        movements_x = [row[:n] for row, n in zip(x, lengths)]
+        movements_y = [row[:n] for row, n in zip(y, lengths)]
         return movements_x, movements_y
 
+    @instrumented("controller.decimate_movements")
+    def decimate_movements(
+        self, x: np.ndarray, y: np.ndarray, lengths: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find points of the stacked pen movements (see compute_motions) which change the drawing
+        at the plot resolution, all of them in one pass. Statistics of the reduction are stored in decimation_report.
+
+        Parameters:
+            x (np.ndarray): (n_circles, samples) array of x coordinates of the pen movements.
+            y (np.ndarray): (n_circles, samples) array of y coordinates of the pen movements.
+            lengths (np.ndarray): Number of points of each movement.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Tuple containing rows and columns of the kept points
+            (ordered by movement and time). All points are kept if decimation is disabled.
+        """
+        if self.resolution is None:
+            return np.nonzero(np.arange(x.shape[1]) < lengths[:, None])
+
+        decimator = PixelGridDecimator(*self.get_ranges(), self.resolution)
+        rows, columns = decimator.reduce_rows(x, y, lengths)
+        self.decimation_report = decimator.report()
+        return rows, columns
+
+    @instrumented("controller.get_static_image")
+    def get_static_image(self) -> str:
+        """
+        Rasterize pen movements into a PNG image.
+
+        Returns:
+            str: PNG image as a data URI.
+        """
+        rasterizer = Rasterizer(
+            *self.get_ranges(), self.resolution or viewport_size
+        )
+        movements_x, movements_y = self.get_points_movements()
+        for xs, ys, color in zip(movements_x, movements_y, self.get_colors()):
+            rasterizer.draw_polyline(xs, ys, color)
+
+        png = b64encode(rasterizer.to_png()).decode("ascii")
+        return "data:image/png;base64," + png
+
+    @instrumented("controller.get_colors")
     def get_colors(self) -> list[int]:
         """
         Get colors of circles.
@@ -100,6 +251,7 @@ class DrawController:
 
         return colors
 
+    @instrumented("controller.get_ranges")
     def get_ranges(self) -> tuple[list[float], list[float]]:
         """
         Get ranges of x and y coordinates.
@@ -116,52 +268,211 @@ class DrawController:
 
         return [-x_range, x_range], [-y_range, y_range]
 
-    def prepare_parameters(self) -> list:
+    @instrumented("controller.get_encoder")
+    def get_encoder(self) -> PayloadEncoder:
+        """
+        Get encoder of the coordinates for the selected encoding.
+
+        Returns:
+            PayloadEncoder: Encoder of the coordinates.
+        """
+        if self.encoding == "int16":
+            x_ranges, y_ranges = self.get_ranges()
+            # Phases of the circle animations are also encoded, so the limit covers pi
+            return Int16Encoder(max(x_ranges[1], y_ranges[1], np.pi))
+        return encoders[self.encoding]()
+
+    @instrumented("controller.prepare_parameters")
+    def prepare_parameters(self) -> dict:
         """
         Prepare parameters for the HTML template.
 
         Returns:
-            list: List of prepared parameters.
+            dict: Prepared parameters by the names of their placeholders.
         """
+        encoder = self.get_encoder()
         b_x, b_y = self.get_borders()
-        circles_xs, circles_ys = self.get_circles_animations()
-        movements_x, movements_y = self.get_points_movements()
+        static_image = ""
+        motion_parameters = []
+        # Streamed drawings are drawn progressively instead of animated
+        animate = self.animate and self.render_mode != "stream"
+        # Pen movements of all circles are concatenated and sent with the number of points of each
+        movements_x = movements_y = np.empty(0, dtype=self.dtype)
+        lengths = np.zeros(0, dtype=int)
+        kept = None
+        if self.render_mode == "stream":
+            # Pen movements are appended by stream_html
+            lengths = np.zeros(len(self.motions), dtype=int)
+        elif self.render_mode == "parametric":
+            motion_parameters = [m.parameters() for m in self.motions]
+        elif self.render_mode == "raster" and not self.animate:
+            # Without circles there is nothing to rasterize (and the ranges are empty)
+            if self.motions:
+                static_image = self.get_static_image()
+        else:
+            x, y, x_center, y_center, samples = self.compute_motions()
+            rows, columns = self.decimate_movements(x, y, samples)
+            movements_x, movements_y = x[rows, columns], y[rows, columns]
+            lengths = np.bincount(rows, minlength=len(samples))
+            if self.resolution is not None:
+                kept = (
+                    movements_x,
+                    movements_y,
+                    x_center[rows, columns],
+                    y_center[rows, columns],
+                )
+        if animate and self.render_mode != "parametric":
+            circles_frames, circles_radii = self.get_circles_animations(kept)
+            frames_lengths = lengths
+        else:
+            circles_frames, circles_radii = np.empty((0, 3)), []
+            frames_lengths = np.zeros(0, dtype=int)
         border_color = self.orbit.color
         movements_colors = self.get_colors()
         x_ranges, y_ranges = self.get_ranges()
 
-        num_parameters = [
+        parameters = {
+            "plotly_url": plotly_url(self.assets_url),
+            "show_borders": int(self.show_borders),
+            "animate": int(animate),
+            "speed": int(self.drawing_speed),
+            "max_lod_level": max_lod_level,
+            "border_color": border_color,
+            "x_range": x_ranges,
+            "y_range": y_ranges,
+            "trace_colors": movements_colors,
+            "static_image": json.dumps(static_image),
+            "motion_parameters": json.dumps(motion_parameters),
+            "circles_radii": json.dumps(circles_radii),
+        }
+        with instrumentation.span("controller.encode_payloads") as span:
+            encoded_parameters = {
+                "x_border": encoder.encode(b_x),
+                "y_border": encoder.encode(b_y),
+                "circles_frames": encoder.encode_rows(
+                    circles_frames, frames_lengths
+                ),
+                "movements_x": encoder.encode_rows(movements_x, lengths),
+                "movements_y": encoder.encode_rows(movements_y, lengths),
+            }
+            span.bytes = sum(map(len, encoded_parameters.values()))
+
+        return parameters | encoded_parameters
+
+    def key(self) -> str:
+        """
+        Calculate hash of all parameters which define the prepared HTML file.
+
+        Returns:
+            str: Hexadecimal digest of the parameters.
+        """
+        return canonical_hash(
+            self.orbit.key(),
+            self.orbit.color,
+            [(m.key(), m.circle.color) for m in self.motions],
+            self.drawing_speed,
             self.show_borders,
             self.animate,
-            self.drawing_speed,
-        ]
-        str_parameterts = list(
-            map(
-                str,
-                [
-                    border_color,
-                    x_ranges,
-                    y_ranges,
-                    movements_colors,
-                    b_x,
-                    b_y,
-                    circles_xs,
-                    circles_ys,
-                    movements_x,
-                    movements_y,
-                ],
-            )
+            self.encoding,
+            self.resolution,
+            self.render_mode,
+            self.dtype.name,
+            self.assets_url,
+            self.template.digest,
         )
 
-        return num_parameters + str_parameterts
-
+    @instrumented("controller.submit_parameters")
     def submit_parameters(self) -> str:
         """
         Submit prepared parameters.
+        If the controller has a cache, the HTML file prepared for the same parameters is reused.
 
         Returns:
             str: Prepared HTML file.
         """
-        prepared_html_file = self.html_file % tuple(self.prepare_parameters())
+        if self.cache is not None:
+            return self.cache.get_or_create(self.key(), self.build_html)
+
+        prepared_html_file = self.build_html()
 
         return prepared_html_file
+
+    def build_html(self) -> str:
+        """
+        Build the HTML file (all parts of the streamed one in the stream render mode).
+
+        Returns:
+            str: Prepared HTML file.
+        """
+        if self.render_mode == "stream":
+            return "".join(self.stream_html())
+        return self.format_template(self.prepare_parameters())
+
+    def stream_html(self, rotations_per_chunk: int = 1) -> Iterator[str]:
+        """
+        Generate the HTML file in parts (stream render mode). The first part is the page
+        with empty pen movements, and each next part is a script appending the next chunk
+        of every movement (rotations_per_chunk rotations around the orbit), so the browser
+        draws the first rotation before the last one is calculated.
+        Not cached trajectories are calculated chunk by chunk and are not kept,
+        so memory is bounded by the chunk size.
+
+        Parameters:
+            rotations_per_chunk (int, optional): Number of rotations in a chunk. Default is 1.
+
+        Yields:
+            str: Parts of the HTML file.
+        """
+        if self.render_mode != "stream":
+            raise ValueError(
+                "HTML file is streamed only in the stream render mode"
+            )
+
+        page = self.format_template(self.prepare_parameters())
+        end = page.rindex("</body>")
+        yield page[:end]
+
+        encoder = self.get_encoder()
+        decimator = None
+        if self.resolution is not None:
+            decimator = PixelGridDecimator(*self.get_ranges(), self.resolution)
+        chunks = [
+            m.calculate_trajectory_chunks(rotations_per_chunk)
+            for m in self.motions
+        ]
+        for parts in zip_longest(*chunks):
+            chunk_x, chunk_y = [], []
+            for part in parts:
+                # Movements with fewer rotations have already finished
+                xs, ys = (
+                    (np.empty(0), np.empty(0)) if part is None else part[:2]
+                )
+                if decimator is not None:
+                    kept = decimator.reduce(xs, ys)
+                    xs, ys = xs[kept], ys[kept]
+                chunk_x.append(xs)
+                chunk_y.append(ys)
+            with instrumentation.span("controller.stream_chunk") as span:
+                script = (
+                    f"<script>append_chunk({encoder.encode_list(chunk_x)}, "
+                    f"{encoder.encode_list(chunk_y)});</script>\n"
+                )
+                span.bytes = len(script)
+            yield script
+
+        if decimator is not None:
+            self.decimation_report = decimator.report()
+        yield page[end:]
+
+    @instrumented("controller.format_template")
+    def format_template(self, parameters: dict) -> str:
+        """
+        Fill the HTML template with the parameters.
+
+        Parameters:
+            parameters (dict): Parameters prepared by prepare_parameters.
+
+        Returns:
+            str: Prepared HTML file.
+        """
+        return self.template.render(parameters)
@@ -0,0 +1,93 @@
+from time import perf_counter
+
+import numpy as np
+
+
+class PixelGridDecimator:
+
+    def __init__(
+        self,
+        x_range: list[float],
+        y_range: list[float],
+        resolution: int,
+    ):
+        """
+        Initialize PixelGridDecimator object.
+
+        Parameters:
+            x_range (list[float]): Range [x_min, x_max] of the plot.
+            y_range (list[float]): Range [y_min, y_max] of the plot.
+            resolution (int): Number of pixels along the longer side of the plot.
+        """
+        self.x_min = x_range[0]
+        self.y_min = y_range[0]
+        self.pixel = (
+            max(x_range[1] - x_range[0], y_range[1] - y_range[0]) / resolution
+        )
+
+        self.points_in = 0
+        self.points_out = 0
+        self.seconds = 0.0
+
+    def reduce(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Reduce polyline by dropping consecutive points which fall into the same pixel
+        as the point before them. The first and the last point are always kept,
+        so the drawn polyline moves by at most one pixel.
+
+        Parameters:
+            x (np.ndarray): x coordinates of the polyline.
+            y (np.ndarray): y coordinates of the polyline.
+
+        Returns:
+            np.ndarray: Indices of the kept points.
+        """
+        _, columns = self.reduce_rows(x[None], y[None], np.array([len(x)]))
+        return columns
+
+    def reduce_rows(
+        self, x: np.ndarray, y: np.ndarray, lengths: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Reduce polylines stacked into (n, samples) arrays (see SpirographBatch) in one pass, like reduce.
+
+        Parameters:
+            x (np.ndarray): (n, samples) array of x coordinates of the polylines.
+            y (np.ndarray): (n, samples) array of y coordinates of the polylines.
+            lengths (np.ndarray): Number of points of each polyline (the rest of its row is padding).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Tuple containing rows and columns of the kept points
+            (ordered by row and then by column).
+        """
+        start = perf_counter()
+
+        cells_x = np.floor((x - self.x_min) / self.pixel)
+        cells_y = np.floor((y - self.y_min) / self.pixel)
+
+        keep = np.ones(x.shape, dtype=bool)
+        keep[:, 1:] = (cells_x[:, 1:] != cells_x[:, :-1]) | (
+            cells_y[:, 1:] != cells_y[:, :-1]
+        )
+        ends = np.flatnonzero(lengths)
+        keep[ends, lengths[ends] - 1] = True
+        keep &= np.arange(x.shape[1]) < lengths[:, None]
+        rows, columns = np.nonzero(keep)
+
+        self.points_in += int(lengths.sum())
+        self.points_out += len(columns)
+        self.seconds += perf_counter() - start
+        return rows, columns
+
+    def report(self) -> dict:
+        """
+        Report statistics of all reductions made by the decimator.
+
+        Returns:
+            dict: Dictionary with number of points in, points out and time spent (in seconds).
+        """
+        return {
+            "points_in": self.points_in,
+            "points_out": self.points_out,
+            "seconds": self.seconds,
+        }
@@ -0,0 +1,327 @@
+from fractions import Fraction
+from math import gcd, lcm
+
+import numpy as np
+
+from src.motions import CircleMotion, MotionParameter, cached_stage
+from src.shapes import Circle, reduce_phase
+
+
+def rational(value: float, max_denominator: int = 1000) -> Fraction:
+    """
+    Approximate value by the closest fraction with a bounded denominator
+    (e.g. radii entered as decimals).
+
+    Parameters:
+        value (float): The value.
+        max_denominator (int, optional): Maximum denominator of the fraction. Default is 1000.
+
+    Returns:
+        Fraction: The approximation.
+    """
+    return Fraction(value).limit_denominator(max_denominator)
+
+
+class EpicycleMotion(CircleMotion):
+    """
+    Compound spirograph: the first circle of the chain rolls on the orbit, every next one rolls
+    on the previous circle, and the pen is fixed to the last circle.
+
+    Every stage of the chain is a phasor a * exp(i * (speed * t + phase)): in the frame rotating with
+    the previous circle, the center of the next circle goes around it once per one time unit (like the circle
+    around the orbit in CircleMotion) at radius R +/- r, while the circle spins direction * (R +/- r) / r
+    times faster. So the center of the k-th circle moves with the spin of the previous circle plus one,
+    and the pen with the spin of the last circle. The phases (zero by default) set the starting angles
+    of the links. A chain of one circle without phases is the same drawing as CircleMotion.
+    The position is the sum of the phasors, evaluated for all samples at once.
+    """
+
+    chain = MotionParameter()
+    phases = MotionParameter()
+
+    batched = False
+
+    def __init__(
+        self,
+        orbit: Circle,
+        circles: list[Circle],
+        outer: list[bool],
+        distance_to_border: float,
+        quality: int = 5000,
+        tolerance: float | None = None,
+        dtype: np.dtype = np.float64,
+        phases: list[float] | None = None,
+    ):
+        """
+        Initialize EpicycleMotion object.
+
+        Parameters:
+            orbit (Circle): The orbit (only circles, so every stage is a phasor).
+            circles (list[Circle]): Chain of circles, each one rolls on the previous one
+                (the first one on the orbit). The pen is on the last circle.
+            outer (list[bool]): Flags indicating whether each circle rolls outer or inner the previous one.
+            distance_to_border (float): Distance from the pen to the border of the last circle.
+            quality (int, optional): Number of points used for calculation. Default is 5000.
+            tolerance (float, optional): Maximum distance (in pixels) between the drawn polyline and
+                the exact curve (see CircleMotion). Default is None.
+            dtype (np.dtype, optional): Type of the calculated coordinates. Default is np.float64.
+            phases (list[float], optional): Starting angles (in radians) of the phasors, one for every
+                circle center and the last one for the pen. Default is None (all zero).
+        """
+        if not isinstance(orbit, Circle):
+            raise ValueError("Circles can be chained only on a circle orbit")
+        if not circles or len(circles) != len(outer):
+            raise ValueError("Every circle of the chain needs its direction")
+        if phases is not None and len(phases) != len(circles) + 1:
+            raise ValueError(
+                "Every circle of the chain and the pen need their phase"
+            )
+
+        super().__init__(
+            orbit,
+            circles[-1],
+            distance_to_border,
+            outer[-1],
+            quality=quality,
+            tolerance=tolerance,
+            dtype=dtype,
+        )
+        self.chain = tuple(
+            (circle, 1 if circle_outer else -1)
+            for circle, circle_outer in zip(circles, outer)
+        )
+        self.phases = tuple(
+            float(phase) for phase in phases or [0.0] * (len(circles) + 1)
+        )
+
+    @property
+    def x_range(self) -> float:
+        """Maximum distance of the drawing from the orbit center along x axis."""
+        return self.orbit.x_range + 2 * sum(
+            circle.x_range for circle, _ in self.chain
+        )
+
+    @property
+    def y_range(self) -> float:
+        """Maximum distance of the drawing from the orbit center along y axis."""
+        return self.orbit.y_range + 2 * sum(
+            circle.y_range for circle, _ in self.chain
+        )
+
+    def key(self) -> tuple:
+        """
+        Describe the parameters which define the motion (without colors).
+
+        It extends CircleMotion.key with the geometry and directions of the chain, and the phases.
+        """
+        return super().key() + (
+            tuple(
+                (circle.key(), direction) for circle, direction in self.chain
+            ),
+            self.phases,
+        )
+
+    def parameters(self) -> dict:
+        """
+        Describe the motion by the parameters of its parametric equations.
+
+        It extends CircleMotion.parameters with the phasors of the chain ([amplitude, speed, phase]
+        triples, the last one is the pen), which replace the orbit and circle equations.
+        """
+        amplitudes, speeds = self.phasors
+        return {
+            **super().parameters(),
+            "phasors": [
+                [float(a), float(s), phase]
+                for a, s, phase in zip(amplitudes, speeds, self.phases)
+            ],
+        }
+
+    def stage_speeds(
+        self, radius: type = float
+    ) -> tuple[list[float], list[float]]:
+        """
+        Calculate amplitudes and angular speeds of the phasors of the chain.
+
+        Parameters:
+            radius (type, optional): Type the radii are converted to before the speeds are calculated,
+                e.g. rational for exact speeds. Default is float.
+
+        Returns:
+            tuple[list[float], list[float]]: Tuple containing amplitudes of the circle centers
+            and the pen (the last one), and their angular speeds.
+        """
+        amplitudes, speeds = [], []
+        previous = radius(self.orbit.radius)
+        spin = 0
+        for circle, direction in self.chain:
+            current = radius(circle.radius)
+            amplitudes.append(previous + direction * current)
+            speeds.append(spin + 1)
+            spin += direction * (previous + direction * current) / current
+            previous = current
+
+        amplitudes.append(self.circle.radius - self.distance_to_border)
+        speeds.append(spin)
+        return amplitudes, speeds
+
+    @cached_stage
+    def phasors(self) -> tuple[np.ndarray, np.ndarray]:
+        """Amplitudes and angular speeds of the circle centers and the pen (the last phasor)."""
+        amplitudes, speeds = self.stage_speeds()
+        return np.array(amplitudes, dtype=float), np.array(speeds, dtype=float)
+
+    @cached_stage
+    def phase_terms(self) -> np.ndarray:
+        """exp(i * phase) of the circle centers and the pen (the last phasor)."""
+        return np.exp(1j * np.array(self.phases))
+
+    @cached_stage
+    def circle_speed(self) -> float:
+        """Angular speed of the last circle (the pen)."""
+        return float(self.phasors[1][-1])
+
+    def calculate_number_of_rotations(self, max_rot: int = 500) -> int:
+        """
+        Calculate number of rotations needed to close the drawing.
+
+        All phasors return to their start after k rotations when speed * k is an integer for every one of them,
+        so with the speeds written as reduced fractions (of the radii approximated by rational)
+        the period is the least common multiple of their denominators divided by the greatest common divisor
+        of their numerators (phasors with zero amplitude are skipped), and k is the numerator of the period.
+
+        Parameters:
+            max_rot (int, optional): Maximum number of rotations. Default is 500.
+
+        Returns:
+            int: Number of rotations needed to close the drawing (at most max_rot).
+        """
+        amplitudes, speeds = self.stage_speeds(rational)
+        speeds = [
+            speed
+            for amplitude, speed in zip(amplitudes, speeds)
+            if not np.isclose(amplitude, 0) and speed != 0
+        ]
+        if not speeds:
+            return 1
+        period = Fraction(
+            lcm(*(speed.denominator for speed in speeds)),
+            gcd(*(speed.numerator for speed in speeds)),
+        )
+        # The drawing closes after multiples of the period, the smallest integer one is its numerator
+        return min(period.numerator, max_rot)
+
+    @cached_stage
+    def trajectory(
+        self,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Positions of the pen (x, y) and the last circle center (x_center, y_center) with given quality.
+        Uniformly sampled closed drawings are calculated with the inverse FFT.
+        """
+        if self.tolerance is None:
+            trajectory = self.calculate_uniform_trajectory()
+            if trajectory is not None:
+                return trajectory
+        return self.calculate_trajectory(
+            self.calculate_thetas(), self.distance_to_border
+        )
+
+    def calculate_uniform_trajectory(
+        self,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] | None:
+        """
+        Calculate the trajectory in quality uniformly placed points with the inverse FFT.
+
+        Point j of n = quality - 1 points of the closed drawing is at t = 2 * pi * rotations * j / n,
+        so a phasor with speed s contributes exp(2 * pi * i * m * j / n) with an integer m = s * rotations.
+        It is the m mod n frequency of the inverse discrete Fourier transform, so the whole drawing
+        is one inverse FFT of the spectrum with the amplitudes (rotated by their phases) at these frequencies,
+        in O(n log n) regardless of the length of the chain. The last point closes the drawing.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] or None: x, y, x_center and y_center,
+            or None if the drawing does not close within the number of rotations.
+        """
+        amplitudes, speeds = self.phasors
+        n = self.quality - 1
+        frequencies = speeds * self.rotations
+        if n < 1 or not np.allclose(
+            frequencies, np.round(frequencies), rtol=0, atol=1e-9
+        ):
+            return None
+        bins = np.round(frequencies).astype(int) % n
+        amplitudes = amplitudes * self.phase_terms
+
+        center_spectrum = np.zeros(n, dtype=complex)
+        np.add.at(center_spectrum, bins[:-1], amplitudes[:-1])
+        pen_spectrum = center_spectrum.copy()
+        pen_spectrum[bins[-1]] += amplitudes[-1]
+
+        centers = np.fft.ifft(center_spectrum) * n
+        pens = np.fft.ifft(pen_spectrum) * n
+        centers = np.append(centers, centers[0])
+        pens = np.append(pens, pens[0])
+        return tuple(
+            array.astype(self.dtype)
+            for array in (pens.real, pens.imag, centers.real, centers.imag)
+        )
+
+    def calculate_phasor_terms(self, t: float | np.ndarray) -> np.ndarray:
+        """
+        Calculate exp(i * speed * t) of all phasors for all time parameters in one outer product
+        (without the phases, which multiply the amplitudes).
+
+        Parameters:
+            t (float or np.ndarray): Time parameter or array of time parameters.
+
+        Returns:
+            np.ndarray: Array of the shape of t with one more axis (of the phasors).
+        """
+        _, speeds = self.phasors
+        phase = reduce_phase(np.multiply.outer(t, speeds), self.dtype)
+        return np.exp(1j * phase)
+
+    def calculate_trajectory(
+        self, t: float | np.ndarray, distance_to_border: float
+    ) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate trajectory of the pen and the last circle center at time t as the sum of the phasors.
+
+        It overrides CircleMotion.calculate_trajectory.
+        """
+        amplitudes, _ = self.phasors
+        terms = self.calculate_phasor_terms(t)
+        amplitudes = (amplitudes * self.phase_terms).astype(terms.dtype)
+        center = terms[..., :-1] @ amplitudes[:-1]
+        pen = center + terms[..., -1] * self.phase_terms[-1].astype(
+            terms.dtype
+        ) * (self.circle.radius - distance_to_border)
+        return tuple(
+            np.asarray(array, dtype=self.dtype)
+            for array in (pen.real, pen.imag, center.real, center.imag)
+        )
+
+    def calculate_derivatives(
+        self, t: float | np.ndarray, distance_to_border: float
+    ) -> tuple[float, float, float, float] | tuple[np.ndarray, ...]:
+        """
+        Calculate derivatives of the trajectory of the pen at time t:
+        every phasor a * exp(i * s * t) (with a rotated by its phase) contributes i * s * a * exp(i * s * t)
+        and -s^2 * a * exp(i * s * t).
+
+        It overrides CircleMotion.calculate_derivatives.
+        """
+        amplitudes, speeds = self.phasors
+        amplitudes = amplitudes.copy()
+        amplitudes[-1] = self.circle.radius - distance_to_border
+        amplitudes = amplitudes * self.phase_terms
+        terms = np.exp(1j * np.multiply.outer(t, speeds))
+        velocity = terms @ (1j * speeds * amplitudes)
+        acceleration = terms @ (-(speeds**2) * amplitudes)
+        return (
+            velocity.real,
+            velocity.imag,
+            acceleration.real,
+            acceleration.imag,
+        )
@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from threading import Lock, local
+from time import perf_counter
+from typing import Any, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (in seconds) of the buckets of the span duration histograms
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+def payload_size(value: Any) -> int:
+    """
+    Calculate number of bytes produced by a span.
+
+    Parameters:
+        value: Result of the span (arrays, strings and bytes, possibly nested in lists and tuples).
+
+    Returns:
+        int: Total size of the arrays, strings and bytes (other values have size 0).
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(v) for v in value)
+    return 0
+
+
+class Span:
+    """Measurement of one instrumented operation."""
+
+    def __init__(self, name: str, depth: int):
+        """
+        Initialize Span object.
+
+        Parameters:
+            name (str): Name of the operation (e.g. "controller.get_borders").
+            depth (int): Number of spans enclosing the span.
+        """
+        self.name = name
+        self.depth = depth
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def to_dict(self) -> dict:
+        """Describe the span as a dictionary."""
+        return {
+            "name": self.name,
+            "depth": self.depth,
+            "seconds": self.seconds,
+            "bytes": self.bytes,
+        }
+
+
+class Instrumentation:
+    """
+    Opt-in measurements of the drawing pipeline.
+
+    Spans are aggregated into histograms of durations and counters of produced bytes
+    (see to_prometheus). Spans of a render (see render) are also written as one
+    structured log line and can be shown in the app.
+    """
+
+    def __init__(self, enabled: bool, textfile: str | None = None):
+        """
+        Initialize Instrumentation object.
+
+        Parameters:
+            enabled (bool): Whether spans are measured.
+            textfile (str, optional): Path of a file where the Prometheus metrics are written
+                after every render (e.g. for the textfile collector of node_exporter). Default is None.
+        """
+        self.enabled = enabled
+        self.textfile = textfile
+        if enabled and not logger.handlers:
+            # The app and the scripts do not configure logging, so the render lines
+            # (INFO) would be dropped by the default WARNING level
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+        self.lock = Lock()
+        self.buckets = {}
+        self.sums = {}
+        self.bytes = {}
+        self.renders = 0
+        # Spans of the render in progress, separate for every thread (Streamlit session)
+        self.local = local()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        """
+        Measure duration of the block. The block can set bytes of the yielded span.
+
+        Parameters:
+            name (str): Name of the operation.
+
+        Yields:
+            Span: Measurement of the block.
+        """
+        depth = getattr(self.local, "depth", 0)
+        span = Span(name, depth)
+        if not self.enabled:
+            yield span
+            return
+
+        self.local.depth = depth + 1
+        start = perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = perf_counter() - start
+            self.local.depth = depth
+            self.observe(span)
+            spans = getattr(self.local, "spans", None)
+            if spans is not None:
+                spans.append(span)
+
+    def observe(self, span: Span):
+        """
+        Add the span to the histograms and counters.
+
+        Parameters:
+            span (Span): Finished span.
+        """
+        with self.lock:
+            if span.name not in self.buckets:
+                self.buckets[span.name] = [0] * (len(BUCKETS) + 1)
+                self.sums[span.name] = 0.0
+                self.bytes[span.name] = 0
+            self.buckets[span.name][bisect_left(BUCKETS, span.seconds)] += 1
+            self.sums[span.name] += span.seconds
+            self.bytes[span.name] += span.bytes
+
+    @contextmanager
+    def render(self, name: str = "render") -> Iterator[list[Span]]:
+        """
+        Collect spans of one render. When the block ends, they are written as one JSON log line
+        and the Prometheus metrics are written to the textfile (if set).
+
+        Parameters:
+            name (str, optional): Name of the render in the log. Default is "render".
+
+        Yields:
+            list[Span]: Spans of the render in order of their end (filled as the block runs).
+        """
+        spans = []
+        if not self.enabled:
+            yield spans
+            return
+
+        self.local.spans = spans
+        start = perf_counter()
+        try:
+            yield spans
+        finally:
+            seconds = perf_counter() - start
+            self.local.spans = None
+            with self.lock:
+                self.renders += 1
+
+            logger.info(
+                json.dumps(
+                    {
+                        "event": name,
+                        "seconds": seconds,
+                        "bytes": sum(s.bytes for s in spans if s.depth == 0),
+                        "spans": [s.to_dict() for s in spans],
+                    }
+                )
+            )
+            if self.textfile:
+                # Write to a temporary file first, so the collector never reads a partial file
+                path = Path(self.textfile)
+                temporary = path.with_suffix(path.suffix + ".tmp")
+                temporary.write_text(self.to_prometheus())
+                os.replace(temporary, path)
+
+    def to_prometheus(self) -> str:
+        """
+        Dump the metrics in the Prometheus text format.
+
+        Returns:
+            str: Histograms of span durations, counters of bytes produced by spans and the counter of renders.
+        """
+        lines = [
+            "# HELP spirograph_span_seconds Duration of instrumented operations.",
+            "# TYPE spirograph_span_seconds histogram",
+        ]
+        with self.lock:
+            for name, counts in sorted(self.buckets.items()):
+                label = f'span="{name}"'
+                total = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), counts):
+                    total += count
+                    lines.append(
+                        f'spirograph_span_seconds_bucket{{{label},le="{bound}"}} {total}'
+                    )
+                lines.append(
+                    f"spirograph_span_seconds_sum{{{label}}} {self.sums[name]}"
+                )
+                lines.append(
+                    f"spirograph_span_seconds_count{{{label}}} {total}"
+                )
+
+            lines += [
+                "# HELP spirograph_span_bytes_total Bytes produced by instrumented operations.",
+                "# TYPE spirograph_span_bytes_total counter",
+            ]
+            for name, total in sorted(self.bytes.items()):
+                lines.append(
+                    f'spirograph_span_bytes_total{{span="{name}"}} {total}'
+                )
+
+            lines += [
+                "# HELP spirograph_renders_total Number of instrumented renders.",
+                "# TYPE spirograph_renders_total counter",
+                f"spirograph_renders_total {self.renders}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def instrumented(name: str):
+    """
+    Measure every call of the function as a span with the size of its result.
+
+    Parameters:
+        name (str): Name of the span.
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return function(*args, **kwargs)
+            with instrumentation.span(name) as span:
+                result = function(*args, **kwargs)
+                span.bytes = payload_size(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+# Instrumentation shared by all sessions of the app (in one process),
+# enabled with the SPIROGRAPH_METRICS environment variable
+instrumentation = Instrumentation(
+    enabled=bool(os.environ.get("SPIROGRAPH_METRICS")),
+    textfile=os.environ.get("SPIROGRAPH_METRICS_FILE"),
+)
@@ -1,10 +1,113 @@
+from collections import Counter
+from fractions import Fraction
+from functools import wraps
+from typing import Iterator
+
 import numpy as np
 
+from src.const_params import viewport_size
+from src.metrics import instrumentation, instrumented, payload_size
 from src.shapes import Circle, Shape
 
 
+def closing_period(
+    ratio: float, pen_radius: float, max_rot: int, tolerance: float
+) -> int:
+    """
+    Find the smallest number of rotations k for which the pen, rotating ratio times
+    per rotation, returns to its start within tolerance.
+
+    Walks the continued fraction convergents p/k of ratio, which are the best rational
+    approximations, so it takes O(log max_rot) steps.
+
+    Parameters:
+        ratio (float): Number of pen rotations per one rotation around the orbit.
+        pen_radius (float): Distance from the pen to the center of the circle.
+        max_rot (int): Maximum number of rotations.
+        tolerance (float): Maximum accepted distance between the start and the end point.
+
+    Returns:
+        int: Number of rotations needed to close the drawing.
+    """
+    if not np.isfinite(ratio):
+        raise ValueError(f"Cannot find period of rotation ratio {ratio}")
+
+    h_prev, h = 0, 1
+    k_prev, k = 1, 0
+    x = ratio
+    best_k, best_gap = 1, np.inf
+    while True:
+        a = np.floor(x)
+        h_prev, h = h, a * h + h_prev
+        k_prev, k = k, a * k + k_prev
+        if k > max_rot:
+            return best_k
+
+        # Chord between the start and the end position of the pen
+        gap = 2 * pen_radius * abs(np.sin(np.pi * (k * ratio - h)))
+        if gap < best_gap:
+            best_k, best_gap = int(k), gap
+        if gap <= tolerance or np.isclose(x, a, rtol=0, atol=1e-12):
+            return best_k
+
+        x = 1 / (x - a)
+
+
+class MotionParameter:
+    """
+    Input of CircleMotion. Assigning a different value drops all cached results of the motion.
+    """
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = "_" + name
+
+    def __get__(self, motion: "CircleMotion", owner: type = None):
+        if motion is None:
+            return self
+        return getattr(motion, self.name)
+
+    def __set__(self, motion: "CircleMotion", value):
+        if self.name in vars(motion) and vars(motion)[self.name] == value:
+            return
+        setattr(motion, self.name, value)
+        motion.invalidate()
+
+
+def cached_stage(method):
+    """
+    Turn a CircleMotion method into a lazily computed property,
+    cached until one of the motion parameters changes.
+    Every computation is counted in the stage_counter of the motion
+    and measured as a "motion.<stage>" span.
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(motion: "CircleMotion"):
+        if name not in motion._cache:
+            motion.stage_counter[name] += 1
+            with instrumentation.span("motion." + name) as span:
+                motion._cache[name] = method(motion)
+                span.bytes = payload_size(motion._cache[name])
+        return motion._cache[name]
+
+    return property(wrapper)
+
+
 class CircleMotion:
 
+    orbit = MotionParameter()
+    circle = MotionParameter()
+    distance_to_border = MotionParameter()
+    direction = MotionParameter()
+    quality = MotionParameter()
+    tolerance = MotionParameter()
+    dtype = MotionParameter()
+
+    # Whether the trajectory can be calculated by SpirographBatch
+    batched = True
+
+    @instrumented("motion.init")
     def __init__(
         self,
         orbit: Shape,
@@ -12,6 +115,8 @@ class CircleMotion:
         distance_to_border: float,
         outer: bool,
         quality: int = 5000,
+        tolerance: float | None = None,
+        dtype: np.dtype = np.float64,
     ):
         """
         Initialize CircleMotion object.
@@ -22,21 +127,133 @@ class CircleMotion:
             distance_to_border (float): Distance from the point (pen, or hole in the circle) to the border of the circle.
             outer (bool): Flag indicating whether the circle moves outer or inner the orbit.
             quality (int, optional): Number of points used for calculation. Default is 5000.
+                If tolerance is given, it is the maximum number of points.
+            tolerance (float, optional): Maximum distance (in pixels of a viewport_size plot) between
+                the drawn polyline and the exact curve. If given, points are placed adaptively
+                by the curvature of the drawing instead of uniformly. Default is None.
+            dtype (np.dtype, optional): Type of the calculated coordinates. Time parameters
+                are always float64, so float32 coordinates keep screen precision after many rotations
+                with half of the memory. Default is np.float64.
+
+        Trajectory and animation are calculated lazily on first access and cached
+        until orbit, circle, distance_to_border, direction, quality, tolerance or dtype change.
+        stage_counter counts how many times each stage was calculated.
         """
+        self._cache = {}
+        self.stage_counter = Counter()
 
         self.orbit = orbit
         self.circle = circle
 
         self.distance_to_border = distance_to_border
         self.quality = quality
+        self.tolerance = tolerance
+        self.dtype = np.dtype(dtype)
 
-        self.x_range = self.orbit.x_range + 2 * self.circle.x_range
-        self.y_range = self.orbit.y_range + 2 * self.circle.y_range
-
+        self.orbit_speed = 1
         self.set_up_direction(outer)
-        self.calculate_point_movement()
 
-    def set_up_direction(self, outer):
+    def invalidate(self):
+        """
+        Drop all cached results of the motion.
+        """
+        self._cache.clear()
+
+    @property
+    def x_range(self) -> float:
+        """Maximum distance of the drawing from the orbit center along x axis."""
+        return self.orbit.x_range + 2 * self.circle.x_range
+
+    @property
+    def y_range(self) -> float:
+        """Maximum distance of the drawing from the orbit center along y axis."""
+        return self.orbit.y_range + 2 * self.circle.y_range
+
+    @property
+    def plot_tolerance(self) -> float | None:
+        """Tolerance converted from pixels to units of the plot (None if not given)."""
+        if self.tolerance is None:
+            return None
+        units_per_pixel = 2 * max(self.x_range, self.y_range) / viewport_size
+        return self.tolerance * units_per_pixel
+
+    def has_stage(self, name: str) -> bool:
+        """
+        Check whether result of the stage is cached.
+
+        Parameters:
+            name (str): Name of the stage (e.g. "trajectory").
+
+        Returns:
+            bool: True if the result is cached.
+        """
+        return name in self._cache
+
+    def set_stage(self, name: str, value):
+        """
+        Store result of the stage computed outside of the motion (e.g. by SpirographBatch).
+        It is counted in stage_counter as a computation of the stage.
+
+        Parameters:
+            name (str): Name of the stage (e.g. "trajectory").
+            value: Result of the stage.
+        """
+        self.stage_counter[name] += 1
+        self._cache[name] = value
+
+    @property
+    def nbytes(self) -> int:
+        """Total size (in bytes) of the cached arrays held in memory (memory maps are not counted)."""
+        # Snapshot of the stages, which other sessions may be computing at the same time
+        return sum(
+            array.nbytes
+            for value in tuple(self._cache.values())
+            for array in (value if isinstance(value, tuple) else (value,))
+            if isinstance(array, np.ndarray)
+            and not isinstance(array, np.memmap)
+        )
+
+    def key(self) -> tuple:
+        """
+        Describe the parameters which define the motion (without colors).
+
+        Returns:
+            tuple: Tuple containing the orbit and circle geometry, distance to border,
+            direction, quality, tolerance and name of the dtype.
+        """
+        return (
+            self.orbit.key(),
+            self.circle.key(),
+            self.distance_to_border,
+            self.direction,
+            self.quality,
+            self.tolerance,
+            self.dtype.name,
+        )
+
+    def parameters(self) -> dict:
+        """
+        Describe the motion by the parameters of its parametric equations,
+        so it can be evaluated outside of Python (e.g. by the HTML view).
+
+        Returns:
+            dict: Dictionary with the orbit and circle geometry (see Shape.key), distance to border,
+            direction, orbit and circle speeds, number of rotations, quality and tolerance
+            (converted to units of the plot, None for uniform sampling).
+        """
+        return {
+            "orbit": self.orbit.key(),
+            "circle": self.circle.key(),
+            "distance_to_border": float(self.distance_to_border),
+            "direction": self.direction,
+            "orbit_speed": self.orbit_speed,
+            "circle_speed": float(self.circle_speed),
+            "rotations": int(self.rotations),
+            "quality": int(self.quality),
+            "tolerance": self.plot_tolerance,
+        }
+
+    def set_up_direction(self, outer: bool):
         """
         Set up direction of the motion.
 
@@ -48,13 +265,56 @@ class CircleMotion:
         if outer:
             self.direction = 1
 
-        self.orbit_speed = 1
-        self.circle_speed = (
+    @cached_stage
+    def circle_speed(self) -> float:
+        """Angular speed of the circle relative to the orbit speed."""
+        return (
             self.direction
             * self.orbit.circumference(self.direction * self.circle.radius)
             / self.circle.circumference(0)
         )
 
+    @cached_stage
+    def rotations(self) -> int:
+        """Number of rotations around the orbit needed to converge the drawing."""
+        return self.calculate_number_of_rotations()
+
+    @cached_stage
+    def trajectory(
+        self,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Positions of the pen (x, y) and the circle center (x_center, y_center) with given quality."""
+        return self.calculate_trajectory(
+            self.calculate_thetas(), self.distance_to_border
+        )
+
+    @cached_stage
+    def circle_frames(self) -> np.ndarray:
+        """Center and phase of the circle in each moment of the movement."""
+        return self.calculate_circle_frames(
+            self.x, self.y, self.x_center, self.y_center
+        )
+
+    @property
+    def x(self) -> np.ndarray:
+        """x coordinates of the pen."""
+        return self.trajectory[0]
+
+    @property
+    def y(self) -> np.ndarray:
+        """y coordinates of the pen."""
+        return self.trajectory[1]
+
+    @property
+    def x_center(self) -> np.ndarray:
+        """x coordinates of the circle center."""
+        return self.trajectory[2]
+
+    @property
+    def y_center(self) -> np.ndarray:
+        """y coordinates of the circle center."""
+        return self.trajectory[3]
+
     def calculate_trajectory(
         self, t: float | np.ndarray, distance_to_border: float
     ) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
@@ -72,10 +332,13 @@ class CircleMotion:
 
         """
         x_center, y_center = self.orbit.parametric_equation(
-            t, self.orbit_speed, self.direction * self.circle.radius
+            t,
+            self.orbit_speed,
+            self.direction * self.circle.radius,
+            dtype=self.dtype,
         )
         x, y = self.circle.parametric_equation(
-            t, self.circle_speed, -1 * distance_to_border
+            t, self.circle_speed, -1 * distance_to_border, dtype=self.dtype
         )
 
         x += x_center
@@ -83,93 +346,363 @@ class CircleMotion:
 
         return x, y, x_center, y_center
 
-    def calculate_number_of_rotations(self, max_rot: int = 500) -> int:
+    def calculate_derivatives(
+        self, t: float | np.ndarray, distance_to_border: float
+    ) -> tuple[float, float, float, float] | tuple[np.ndarray, ...]:
+        """
+        Calculate derivatives of the trajectory of the pen at time t.
+
+        Parameters:
+            t (float or np.ndarray): Time parameter or list of time parameters.
+            distance_to_border (float): Distance from the pen to the border of the circle.
+
+        Returns:
+            tuple: Tuple containing the first (dx, dy) and the second (ddx, ddy) derivatives of the pen coordinates.
+        """
+        orbit_derivatives = self.orbit.derivatives(
+            t, self.orbit_speed, self.direction * self.circle.radius
+        )
+        circle_derivatives = self.circle.derivatives(
+            t, self.circle_speed, -1 * distance_to_border
+        )
+        return tuple(
+            o + c for o, c in zip(orbit_derivatives, circle_derivatives)
+        )
+
+    def calculate_thetas(self) -> np.ndarray:
+        """
+        Calculate time parameters of the points of the trajectory.
+
+        Returns:
+            np.ndarray: quality uniformly placed time parameters, or adaptively placed ones
+            if tolerance is given (see calculate_adaptive_thetas).
+        """
+        if self.tolerance is None:
+            return np.linspace(0, self.rotations * 2 * np.pi, self.quality)
+        return self.calculate_adaptive_thetas()
+
+    def calculate_adaptive_thetas(
+        self,
+        samples_per_turn: int = 32,
+        refinements: int = 4,
+        subdivisions: int = 16,
+        max_turn: float = 0.5,
+    ) -> np.ndarray:
+        """
+        Calculate time parameters of the points so the drawn polyline deviates from the exact curve
+        by at most tolerance.
+
+        A chord spanning dt deviates from the curve by at most |r''| * dt^2 / 8, where
+        |r''| = sqrt(ddx^2 + ddy^2) combines the curvature (times squared speed along the arc)
+        and the change of the speed. So the local density of points is sqrt(|r''| / (8 * tolerance)).
+        It is evaluated on a pilot grid (samples_per_turn points per turn of the pen) with the analytic
+        derivatives of the shapes, and its integral is inverted to place the points.
+
+        The bound does not hold where the first derivative jumps, e.g. at cusps of the path
+        of the circle center rolling inside an orbit more curved than the circle (|r''| spikes
+        towards infinity between the pilot points). Pilot intervals in which the velocity turns
+        by more than max_turn radians (relative to its length) and which are longer than tolerance
+        are split into subdivisions intervals, refinements times. Smooth turns get straighter
+        with every split, and a point is placed in each interval still turning at the finest level,
+        at the corner of the drawing. Intervals over which |r''| changes more than twice
+        (and whose bound is above tolerance) are split as well, so narrow peaks of the density
+        (e.g. near the cusps of elipse orbits) are sampled.
+
+        The points are placed by the density, and chords spanning a peak of |r''| above tolerance
+        are split evenly. Finally chords whose middle deviates from the curve by more than tolerance
+        are halved, refinements times (the page mirrors all of it in motion_thetas).
+
+        Parameters:
+            samples_per_turn (int, optional): Density of the pilot grid. Default is 32.
+            refinements (int, optional): Number of refinements of the pilot grid. Default is 4.
+            subdivisions (int, optional): Number of intervals a refined interval is split into. Default is 16.
+            max_turn (float, optional): Turn of the velocity over a pilot interval (in radians)
+                above which the interval is refined. Default is 0.5.
+
+        Returns:
+            np.ndarray: Time parameters of the points (at most quality of them).
+        """
+        t_end = self.rotations * 2 * np.pi
+        turns = self.rotations * (abs(self.circle_speed) + self.orbit_speed)
+        pilot = np.linspace(
+            0, t_end, int(min(samples_per_turn * turns, 4 * self.quality)) + 1
+        )
+
+        tolerance = self.plot_tolerance
+
+        for level in range(refinements + 1):
+            dx, dy, ddx, ddy = self.calculate_derivatives(
+                pilot, self.distance_to_border
+            )
+            x, y, _, _ = self.calculate_trajectory(
+                pilot, self.distance_to_border
+            )
+            steps = np.diff(pilot)
+            speed = np.hypot(dx, dy)
+            path = (speed[1:] + speed[:-1]) / 2 * steps
+            speed = np.maximum(speed[1:], speed[:-1])
+            acceleration = np.hypot(ddx, ddy)
+            change = np.hypot(np.diff(dx), np.diff(dy))
+            turning = (
+                # The velocity turns sharply between the ends of the interval
+                (change > max_turn * speed)
+                # The path turns back within the interval (the chord is shorter than the path)
+                | (np.hypot(np.diff(x), np.diff(y)) < path - tolerance)
+                # |r''| spikes within the interval (the velocity changes more than its ends explain)
+                | (
+                    (change > (acceleration[1:] + acceleration[:-1]) * steps)
+                    & (change * steps > tolerance)
+                )
+            )
+            # Turns within intervals shorter than tolerance need no more points of the pilot
+            sharp = turning & (speed * steps > tolerance)
+            # The density changes sharply over the interval, so the pilot may miss its peak
+            lower = np.minimum(acceleration[1:], acceleration[:-1])
+            upper = np.maximum(acceleration[1:], acceleration[:-1])
+            steep = (upper > 2 * lower) & (upper * steps**2 / 8 > tolerance)
+            refined = sharp | steep
+            if level == refinements or not refined.any():
+                break
+            inserted = np.outer(
+                steps[refined], np.arange(1, subdivisions) / subdivisions
+            )
+            pilot = np.sort(
+                np.concatenate(
+                    (pilot, (pilot[:-1][refined, None] + inserted).ravel())
+                )
+            )
+
+        corners = (pilot[:-1][turning] + pilot[1:][turning]) / 2
+        density = np.sqrt(acceleration / (8 * tolerance))
+
+        counts = np.concatenate(
+            ([0], np.cumsum((density[1:] + density[:-1]) / 2 * steps))
+        )
+        n_points = int(
+            np.clip(
+                np.ceil(counts[-1]) + 1, 2, max(self.quality - len(corners), 2)
+            )
+        )
+        thetas = np.interp(np.linspace(0, counts[-1], n_points), counts, pilot)
+        thetas = np.union1d(thetas, corners[: max(self.quality - n_points, 0)])
+
+        # Spikes of |r''| narrower than the spacing of the points get (almost) no points
+        # from the density, so chords are checked against the peak of |r''| in the pilot
+        # intervals they span (except the turning ones, whose corners have a point)
+        # and the ones above tolerance are split evenly
+        peaks = np.where(
+            turning, 0, np.maximum(acceleration[1:], acceleration[:-1])
+        )
+        first = np.clip(
+            np.searchsorted(pilot, thetas, side="right") - 1, 0, len(steps) - 1
+        )
+        peaks = np.maximum(
+            np.maximum.reduceat(peaks, first)[:-1], peaks[first[1:]]
+        )
+        errors = peaks * np.diff(thetas) ** 2 / 8
+        # Chords placed by the density deviate up to about tolerance, so only the spikes are split
+        splits = np.where(
+            errors > 2 * tolerance, np.ceil(np.sqrt(errors / tolerance)), 1
+        ).astype(int)
+        # Within quality, chords with the largest errors are split first
+        budget = self.quality - len(thetas)
+        order = np.argsort(-errors, kind="stable")
+        kept = np.cumsum(np.maximum(splits[order] - 1, 0)) <= budget
+        splits[order[~kept]] = 1
+        split = splits > 1
+        if split.any():
+            inserted = [
+                np.linspace(start, stop, n + 1)[1:-1]
+                for start, stop, n in zip(
+                    thetas[:-1][split], thetas[1:][split], splits[split]
+                )
+            ]
+            thetas = np.union1d(thetas, np.concatenate(inserted))
+
+        # Peaks missed by the pilot are found by the deviation of the curve from the middle
+        # of the chords, and such chords are halved
+        for _ in range(refinements):
+            middles = (thetas[1:] + thetas[:-1]) / 2
+            x, y, _, _ = self.calculate_trajectory(
+                thetas, self.distance_to_border
+            )
+            mx, my, _, _ = self.calculate_trajectory(
+                middles, self.distance_to_border
+            )
+            chord_x, chord_y = np.diff(x), np.diff(y)
+            length = np.maximum(np.hypot(chord_x, chord_y), 1e-12)
+            deviation = np.abs(
+                (mx - x[:-1]) * chord_y - (my - y[:-1]) * chord_x
+            )
+            deviation = deviation / length
+            budget = self.quality - len(thetas)
+            order = np.argsort(-deviation, kind="stable")[:budget]
+            halved = middles[order[deviation[order] > tolerance]]
+            if not len(halved):
+                break
+            thetas = np.union1d(thetas, halved)
+        return thetas
+
+    def calculate_number_of_rotations(
+        self, max_rot: int = 500, tolerance: float = 0.1
+    ) -> int:
         """
         Calculate number of rotations around bigger circle needed to converge the drawing.
 
+        The center returns to its start after every full rotation, so the drawing
+        closes after k rotations when circle_speed * k is an integer, i.e. k is the
+        denominator of circle_speed written as a reduced fraction.
+        For a circle orbit the ratio (R +/- r) / r is rational, so k = r / gcd(R, r).
+        For other orbits (e.g. elipse) the ratio is irrational in general, so the
+        continued fraction convergents of circle_speed are checked until the gap
+        between the start and the end of the drawing is below tolerance.
+        If no convergent with at most max_rot rotations meets the tolerance,
+        the one with the smallest gap is returned.
+
         Parameters:
             max_rot (int, optional): Maximum number of rotations to check. Default is 500.
+            tolerance (float, optional): Maximum distance between the start and the end
+                of the drawing accepted as converged. Default is 0.1 (well below a pixel
+                at the default plot size).
 
         Returns:
             int: Number of rotations needed to converge the drawing.
         """
-
-        x_start, y_start, _, _ = self.calculate_trajectory(
-            0, self.distance_to_border
+        pen_radius = abs(self.circle.radius - self.distance_to_border)
+        if np.isclose(pen_radius, 0):
+            # The pen sits in the center of the circle and traces the orbit itself
+            return 1
+
+        if isinstance(self.orbit, Circle):
+            orbit_radius = Fraction(self.orbit.radius).limit_denominator(1000)
+            radius = Fraction(self.circle.radius).limit_denominator(1000)
+            ratio = (orbit_radius + self.direction * radius) / radius
+            if ratio.denominator <= max_rot:
+                return ratio.denominator
+
+        return closing_period(
+            abs(self.circle_speed / self.orbit_speed),
+            pen_radius,
+            max_rot,
+            tolerance,
         )
 
-        for i in range(1, max_rot):
-            t = 2 * i * np.pi
-            x, y, _, _ = self.calculate_trajectory(t, self.distance_to_border)
-            if np.isclose(y, y_start) and np.isclose(x, x_start):
-                return i
+    def calculate_trajectory_chunks(
+        self, rotations_per_chunk: int = 1
+    ) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Calculate the trajectory in chunks, each covering rotations_per_chunk rotations around the orbit.
+        Concatenated chunks are equal to the trajectory. If the trajectory is cached, chunks are its slices.
+        Otherwise the chunks are calculated one at a time and not cached, so only one chunk
+        is held in memory (with adaptive sampling also the time parameters of all points).
 
-        return 50  # max_rot
-        # raise Exception("Could not converge the drawing")
+        Parameters:
+            rotations_per_chunk (int, optional): Number of rotations in a chunk. Default is 1.
 
-    def calculate_point_movement(self):
+        Yields:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: x, y, x_center and y_center of the chunk.
+        """
+        t_end = self.rotations * 2 * np.pi
+        steps = np.arange(0, self.rotations, rotations_per_chunk)[1:]
+        if self.tolerance is None:
+            n_points = self.quality
+            # Indices of the first points of the chunks (point i is at t_end * i / (n_points - 1))
+            bounds = np.ceil(steps / self.rotations * (n_points - 1))
+        else:
+            thetas = self.calculate_adaptive_thetas()
+            n_points = len(thetas)
+            bounds = np.searchsorted(thetas, steps * 2 * np.pi)
+        bounds = np.concatenate(([0], bounds, [n_points])).astype(int)
+
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if self.has_stage("trajectory"):
+                yield tuple(array[start:end] for array in self.trajectory)
+                continue
+            if self.tolerance is None:
+                # The same values as np.linspace(0, t_end, n_points)[start:end]
+                chunk = np.arange(start, end) * (t_end / (n_points - 1))
+                if end == n_points:
+                    chunk[-1] = t_end
+            else:
+                chunk = thetas[start:end]
+            yield self.calculate_trajectory(chunk, self.distance_to_border)
+
+    def calculate_point_movement(self) -> tuple[np.ndarray, np.ndarray]:
         """
         Calculate movement of the point with given quality.
         It generates value_of(quality) points which can be plotted.
-        """
-        rotations = self.calculate_number_of_rotations()
-
-        thetas = np.linspace(0, rotations * 2 * np.pi, self.quality)
 
-        self.x, self.y, self.x_center, self.y_center = (
-            self.calculate_trajectory(thetas, self.distance_to_border)
-        )
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Tuple containing x and y coordinates of the pen.
+        """
         return self.x, self.y
 
     def calculate_circle_position(
         self,
-        x: float,
-        y: float,
-        x_center: float,
-        y_center: float,
+        x: float | np.ndarray,
+        y: float | np.ndarray,
+        x_center: float | np.ndarray,
+        y_center: float | np.ndarray,
         N_POINTS: int = 10,
     ) -> tuple[np.ndarray, np.ndarray]:
         """
         Calculate position of N_POINTS on the circle based on current position of the point (x,y) and the circle center.
 
         Parameters:
-            x (float): x coordinate of the point.
-            y (float): y coordinate of the point.
-            x_center (float): x coordinate of the circle center.
-            y_center (float): y coordinate of the circle center.
+            x (float or np.ndarray): x coordinate of the point.
+            y (float or np.ndarray): y coordinate of the point.
+            x_center (float or np.ndarray): x coordinate of the circle center.
+            y_center (float or np.ndarray): y coordinate of the circle center.
             N_POINTS (int, optional): Number of points on the circle. Default is 10.
 
         Returns:
-            tuple[np.ndarray, np.ndarray]: Tuple containing list of x and list of y coordinates of the circle positions.
+            tuple[np.ndarray, np.ndarray]: Tuple containing x and y coordinates of the circle positions.
+                For array inputs of shape (n,) the outputs have shape (n, N_POINTS).
         """
         start_angle = np.arctan2(y - y_center, x - x_center)
-        thetas = np.linspace(start_angle, start_angle + 2 * np.pi, N_POINTS)
+        thetas = np.add.outer(start_angle, np.linspace(0, 2 * np.pi, N_POINTS))
 
         x, y = self.circle.parametric_equation(
-            thetas, 1, -self.distance_to_border
+            thetas, 1, -self.distance_to_border, dtype=self.dtype
         )
-        x += x_center
-        y += y_center
+        x += np.expand_dims(x_center, -1)
+        y += np.expand_dims(y_center, -1)
 
         return x, y
 
-    def calculate_circle_movement(
-        self,
-    ) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    @staticmethod
+    def calculate_circle_frames(
+        x: np.ndarray,
+        y: np.ndarray,
+        x_center: np.ndarray,
+        y_center: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Calculate frames of the circle animation. A frame describes the circle by its center
+        and the phase (angle from the center to the point), so the outline given by
+        calculate_circle_position can be drawn from three numbers.
+
+        Parameters:
+            x (np.ndarray): x coordinates of the point.
+            y (np.ndarray): y coordinates of the point.
+            x_center (np.ndarray): x coordinates of the circle center.
+            y_center (np.ndarray): y coordinates of the circle center.
+
+        Returns:
+            np.ndarray: (n, 3) array with x_center, y_center and phase of each frame.
+        """
+        frames = np.empty((len(x), 3), dtype=x.dtype)
+        frames[:, 0] = x_center
+        frames[:, 1] = y_center
+        frames[:, 2] = np.arctan2(y - y_center, x - x_center)
+        return frames
+
+    def calculate_circle_movement(self) -> np.ndarray:
         """
         Calculate movement of the circle.
 
         Returns:
-            tuple: Tuple containing lists of numpy ndarrays representing x and y
-            coordinates of the circle movement.
+            np.ndarray: (quality, 3) array with center and phase of the circle
+            in each moment of the movement (see calculate_circle_frames).
         """
-        xs, ys = [], []
-        for x, y, x_center, y_center in zip(
-            self.x, self.y, self.x_center, self.y_center
-        ):
-            x_circle, y_circle = self.calculate_circle_position(
-                x, y, x_center, y_center
-            )
-            xs.append(x_circle)
-            ys.append(y_circle)
-        return xs, ys
+        return self.circle_frames
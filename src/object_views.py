@@ -1,14 +1,23 @@
+import numpy as np
 import streamlit as st
 
-from src.const_params import avail_colors
+from src.cache import RenderCache, canonical_hash
+from src.const_params import avail_colors, sweep_max_drawings
+from src.epicycles import EpicycleMotion
 from src.motions import CircleMotion
 from src.shapes import Circle, Shape
+from src.sweep import ParameterSweep
 
 
 class CircleView:
 
     def __init__(
-        self, id: int, columns: st.columns, min_radius: int, max_radius: int
+        self,
+        id: int,
+        columns: st.columns,
+        min_radius: int,
+        max_radius: int,
+        chainable: bool = False,
     ):
         """
         Initialize CircleView object.
@@ -18,11 +27,15 @@ class CircleView:
             columns (st.columns): Streamlit columns object (with at least 4 columns) to organize input elements.
             min_radius (int): Minimum value for the radius input.
             max_radius (int): Maximum value for the radius input.
+            chainable (bool, optional): Whether the circle can roll on the previous circle
+                instead of the orbit. Default is False.
         """
         self.id = id
         self.columns = columns
         self.min_radius = min_radius
         self.max_radius = max_radius
+        self.chainable = chainable
+        self.on_previous = False
 
     def show_inputs(self):
         """
@@ -47,7 +60,7 @@ class CircleView:
                 key=f"color_{self.id}",
                 label="Select color:",
                 options=avail_colors.keys(),
-                index=self.id + 1,
+                index=(self.id + 1) % len(avail_colors),
             )
         with self.columns[2]:
             self.pen_distance = st.number_input(
@@ -65,14 +78,34 @@ class CircleView:
                 key=f"outer_{self.id}",
                 label="Outside roll",
             )
+            if self.chainable:
+                self.on_previous = c.toggle(
+                    key=f"on_previous_{self.id}",
+                    label="Roll on previous circle",
+                )
 
-    def submit(self, orbit: Shape, quality: int) -> CircleMotion:
+    def submit(
+        self,
+        orbit: Shape,
+        quality: int,
+        tolerance: float | None = None,
+        cache: RenderCache | None = None,
+        dtype: np.dtype = np.float64,
+        chain: list["CircleView"] | None = None,
+    ) -> CircleMotion:
         """
         Submit circle motion parameters based on user inputs.
 
         Parameters:
             orbit: The orbit shape for the circle motion.
             quality (int): Quality parameter for the motion calculation.
+            tolerance (float, optional): Screen-space tolerance (in pixels) of adaptive sampling.
+                If None, quality points are placed uniformly. Default is None.
+            cache (RenderCache, optional): Cache of motions. If given, a cached motion
+                with the same parameters is returned instead of a new one. Default is None.
+            dtype (np.dtype, optional): Type of the calculated coordinates. Default is np.float64.
+            chain (list[CircleView], optional): Views of the circles between the orbit and this circle,
+                each one rolling on the previous one. If given, an EpicycleMotion is returned. Default is None.
 
         Returns:
             CircleMotion: The initialized CircleMotion object
@@ -82,8 +115,134 @@ class CircleView:
 
         distance_to_border = self.radius - self.pen_distance
 
-        motion = CircleMotion(
-            orbit, circle, distance_to_border, self.outer, quality=quality
-        )
+        if chain:
+            motion = EpicycleMotion(
+                orbit,
+                [Circle(view.radius, None) for view in chain] + [circle],
+                [view.outer for view in chain] + [self.outer],
+                distance_to_border,
+                quality=quality,
+                tolerance=tolerance,
+                dtype=dtype,
+            )
+        else:
+            motion = CircleMotion(
+                orbit,
+                circle,
+                distance_to_border,
+                self.outer,
+                quality=quality,
+                tolerance=tolerance,
+                dtype=dtype,
+            )
+
+        if cache is not None:
+            key = canonical_hash(motion.key(), circle.color)
+            motion = cache.get_or_create(key, lambda: motion)
 
         return motion
+
+
+class SweepView:
+
+    def __init__(self, max_radius: int):
+        """
+        Initialize SweepView object.
+
+        Parameters:
+            max_radius (int): Maximum value of the swept radius.
+        """
+        self.max_radius = max_radius
+
+    def show_inputs(self):
+        """
+        Show input elements for selecting ranges of the swept circle parameters.
+        """
+        columns = st.columns(4)
+        with columns[0]:
+            self.radii = st.slider(
+                key="sweep_radii",
+                label="Range of radius:",
+                min_value=1,
+                max_value=max(self.max_radius - 1, 2),
+                value=(
+                    max(int(self.max_radius / 8), 1),
+                    max(int(self.max_radius / 2), 2),
+                ),
+            )
+            self.radius_steps = st.number_input(
+                key="sweep_radius_steps",
+                label="Number of radii:",
+                min_value=1,
+                max_value=50,
+                value=10,
+            )
+        with columns[1]:
+            self.pen_ratios = st.slider(
+                key="sweep_pen_ratios",
+                label="Range of distance from center (part of radius):",
+                min_value=0.0,
+                max_value=1.0,
+                value=(0.25, 1.0),
+            )
+            self.pen_steps = st.number_input(
+                key="sweep_pen_steps",
+                label="Number of distances:",
+                min_value=1,
+                max_value=20,
+                value=8,
+            )
+        with columns[2]:
+            self.outer = st.multiselect(
+                key="sweep_outer",
+                label="Roll:",
+                options=[False, True],
+                default=[False, True],
+                format_func=lambda outer: "Outside" if outer else "Inside",
+            )
+        with columns[3]:
+            self.color = st.selectbox(
+                key="sweep_color",
+                label="Select color:",
+                options=avail_colors.keys(),
+                index=1,
+            )
+
+    def submit(
+        self, orbit: Shape, quality: int, dtype: np.dtype = np.float64
+    ) -> ParameterSweep:
+        """
+        Submit the swept ranges based on user inputs.
+
+        Parameters:
+            orbit (Shape): The orbit shape shared by the drawings.
+            quality (int): Maximum number of points of each drawing.
+            dtype (np.dtype, optional): Type of the calculated coordinates. Default is np.float64.
+
+        Returns:
+            ParameterSweep: The initialized ParameterSweep object.
+        """
+        # Fewer radii keep the number of drawings within the limit
+        radius_steps = min(
+            self.radius_steps,
+            max(
+                sweep_max_drawings
+                // (self.pen_steps * max(len(self.outer), 1)),
+                1,
+            ),
+        )
+        if radius_steps < self.radius_steps:
+            st.warning(
+                f"Sweeps are limited to {sweep_max_drawings} drawings, "
+                f"so only {radius_steps} radii are drawn."
+            )
+        radii = np.unique(np.round(np.linspace(*self.radii, radius_steps), 2))
+        pen_ratios = np.linspace(*self.pen_ratios, self.pen_steps)
+        return ParameterSweep(
+            orbit,
+            radii,
+            pen_ratios,
+            outer=tuple(self.outer),
+            quality=quality,
+            dtype=dtype,
+        )
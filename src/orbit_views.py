@@ -1,9 +1,36 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
 import streamlit as st
 
-from src.const_params import avail_colors
-from src.shapes import Circle, Elipse, Shape
+from src.const_params import avail_colors, max_number_of_circles
+from src.shapes import Circle, Elipse, SampledPathShape, Shape
+
+
+def outline(radius, quality: int = 2000) -> np.ndarray:
+    """
+    Sample closed outline given by its distance from the center.
+
+    Parameters:
+        radius (callable): Function of the angle returning the distance from the center.
+        quality (int, optional): Number of sampled points. Default is 2000.
+
+    Returns:
+        np.ndarray: (quality, 2) array of points of the outline.
+    """
+    thetas = np.linspace(0, 2 * np.pi, quality, endpoint=False)
+    r = radius(thetas)
+    return np.column_stack((r * np.cos(thetas), r * np.sin(thetas)))
+
+
+# Outlines of the path orbits (for the size 1)
+path_outlines = {
+    "Rounded square": lambda: outline(
+        lambda t: (np.abs(np.cos(t)) ** 6 + np.abs(np.sin(t)) ** 6) ** (-1 / 6)
+    ),
+    "Star": lambda: outline(lambda t: 1 + 0.15 * np.cos(5 * t)),
+    "Gear": lambda: outline(lambda t: 1 + 0.06 * np.tanh(4 * np.sin(12 * t))),
+}
 
 
 class AbstractShapeOrbitView(ABC):
@@ -124,6 +151,78 @@ class ElipseOrbitView(AbstractShapeOrbitView):
         return "Elipse Orbit"
 
 
+class PathOrbitView(AbstractShapeOrbitView):
+
+    def __init__(self, orbit_color: int):
+        """
+        Initialize PathOrbitView object.
+        """
+        super().__init__(orbit_color)
+
+    def show_inputs(self):
+        """
+        Show input elements for selecting the outline of the orbit and its size.
+        """
+        col1, col2 = st.columns(2)
+
+        with col1:
+            self.outline = st.selectbox(
+                key="path_outline",
+                label="Select outline of orbit:",
+                options=[*path_outlines, "From file"],
+            )
+            self.file = None
+            if self.outline == "From file":
+                self.file = st.file_uploader(
+                    key="path_file",
+                    label="Points of the closed outline (x y in each line):",
+                    type=["txt", "csv"],
+                )
+
+        with col2:
+            self.size = st.number_input(
+                key="path_size",
+                min_value=5,
+                max_value=200,
+                value=96,
+                label="Select size of orbit:",
+            )
+
+    def create_orbit(self) -> tuple[SampledPathShape, int]:
+        """
+        Create orbit of the selected outline scaled to the selected size (half of its larger side).
+
+        Returns:
+            tuple[SampledPathShape, int]: Tuple containing the initialized orbit SampledPathShape object
+            and the integer maximum radius.
+        """
+        color = avail_colors[self.orbit_color]
+        orbit = None
+        if self.file is not None:
+            try:
+                lines = self.file.getvalue().decode().replace(",", " ")
+                orbit = SampledPathShape(np.loadtxt(lines.splitlines()), color)
+            except ValueError as error:
+                # Malformed uploads must not break the page on every rerun
+                st.error(f"Cannot read the outline from the file: {error}")
+        if orbit is None:
+            # Selected preset (the default one until a valid file is uploaded)
+            outline = path_outlines.get(
+                self.outline, path_outlines["Rounded square"]
+            )
+            orbit = SampledPathShape(outline(), color)
+
+        scale = self.size / max(orbit.x_range, orbit.y_range)
+        orbit = SampledPathShape(orbit.points * scale, orbit.color)
+        # Circles need at least the radius 1 (of at most max_radius - 1)
+        max_radius = max(int(min(orbit.x_range, orbit.y_range) / 2), 2)
+        return orbit, max_radius
+
+    def __str__(self):
+        """String representation."""
+        return "Path Orbit"
+
+
 class OrbitView:
     def __init__(self):
         """
@@ -135,6 +234,7 @@ class OrbitView:
         self.list_of_orbits: list[AbstractShapeOrbitView] = [
             CircleOrbitView,
             ElipseOrbitView,
+            PathOrbitView,
         ]
 
     def show_inputs(self):
@@ -147,6 +247,24 @@ class OrbitView:
             self.show_borders = st.toggle("Show orbit borders")
         with self.columns[1]:
             self.animate = st.toggle("Animate")
+            render_modes = {
+                "vector": "Points",
+                "raster": "Image",
+                "parametric": "Equations",
+                "stream": "Chunks",
+            }
+            self.render_mode = st.selectbox(
+                key="render_mode",
+                label="Send drawing as:",
+                options=render_modes.keys(),
+                format_func=render_modes.get,
+                help="Points: the server calculates the drawing. "
+                "Image: the server draws the picture (faster for dense drawings, "
+                "not used when animating). "
+                "Equations: the browser calculates the drawing from its parameters. "
+                "Chunks: the drawing is shown rotation by rotation as it is calculated "
+                "(not animated).",
+            )
         with self.columns[2]:
             self.orbit_color = st.selectbox(
                 key="orbit_color",
@@ -157,15 +275,16 @@ class OrbitView:
         with self.columns[3]:
             self.speed = st.number_input(
                 key="speed",
-                label="Select speed of animation:",
-                min_value=1,
-                max_value=200,
-                value=2,
+                label="Select speed of animation (points per second):",
+                min_value=10,
+                max_value=100000,
+                value=200,
+                step=10,
             )
         with self.columns[4]:
             self.number_of_circles = st.number_input(
                 min_value=0,
-                max_value=5,
+                max_value=max_number_of_circles,
                 value=1,
                 label="How many circles you want to use?",
             )
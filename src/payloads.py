@@ -0,0 +1,163 @@
+import json
+from abc import ABC, abstractmethod
+from base64 import b64encode
+
+import numpy as np
+
+
+class PayloadEncoder(ABC):
+    @abstractmethod
+    def encode(self, array: np.ndarray) -> str:
+        """
+        Abstract method to encode an array into a JavaScript expression
+        which can be decoded in the HTML template with decode_array.
+
+        Parameters:
+            array (np.ndarray): 1-D or 2-D array of coordinates.
+
+        Returns:
+            str: JavaScript expression representing the array.
+        """
+        pass
+
+    def encode_list(self, arrays: list[np.ndarray]) -> str:
+        """
+        Encode list of arrays into a JavaScript array expression.
+
+        Parameters:
+            arrays (list[np.ndarray]): List of arrays of coordinates.
+
+        Returns:
+            str: JavaScript expression representing the list of arrays.
+        """
+        return "[" + ", ".join(self.encode(array) for array in arrays) + "]"
+
+    def encode_rows(self, values: np.ndarray, lengths: np.ndarray) -> str:
+        """
+        Encode rows of coordinates concatenated into one array (e.g. gathered from the stacked
+        arrays of SpirographBatch) into a JavaScript expression which decode_rows splits into the rows.
+
+        Parameters:
+            values (np.ndarray): Rows concatenated along the first axis.
+            lengths (np.ndarray): Number of items of each row.
+
+        Returns:
+            str: JavaScript expression representing the list of rows.
+        """
+        if not len(lengths):
+            return "[]"
+        return self.encode_list(np.split(values, np.cumsum(lengths)[:-1]))
+
+
+class TextEncoder(PayloadEncoder):
+    def encode(self, array: np.ndarray) -> str:
+        """
+        Encode array as a (nested) list of decimal numbers.
+
+        It overrides the abstract method encode.
+        """
+        return str(np.asarray(array).tolist())
+
+
+class Float32Encoder(PayloadEncoder):
+    def encode(self, array: np.ndarray) -> str:
+        """
+        Encode array as base64 little-endian float32 buffer.
+
+        It overrides the abstract method encode.
+        """
+        array = np.ascontiguousarray(array, dtype="<f4")
+        return self.describe(array, "float32", 1)
+
+    def encode_rows(self, values: np.ndarray, lengths: np.ndarray) -> str:
+        """
+        Encode rows as one base64 little-endian float32 buffer with the lengths of the rows.
+
+        It overrides the method encode_rows.
+        """
+        array = np.ascontiguousarray(values, dtype="<f4")
+        return self.describe(array, "float32", 1, lengths)
+
+    @staticmethod
+    def describe(
+        array: np.ndarray,
+        dtype: str,
+        scale: float,
+        lengths: np.ndarray | None = None,
+    ) -> str:
+        """
+        Describe encoded buffer as a JavaScript object.
+
+        Parameters:
+            array (np.ndarray): Array in its final binary representation.
+            dtype (str): Name of the JavaScript typed array type ("float32" or "int16").
+            scale (float): Factor which restores the coordinates from the stored values.
+            lengths (np.ndarray, optional): Number of items of each row, if the array holds
+                concatenated rows (see encode_rows). Default is None.
+
+        Returns:
+            str: JavaScript object with the shape, type, scale and base64 data of the array.
+        """
+        payload = {
+            "dtype": dtype,
+            "shape": list(array.shape),
+            "scale": scale,
+            "data": b64encode(array.tobytes()).decode("ascii"),
+        }
+        if lengths is not None:
+            payload["lengths"] = [int(length) for length in lengths]
+        return json.dumps(payload)
+
+
+class Int16Encoder(PayloadEncoder):
+    def __init__(self, limit: float):
+        """
+        Initialize Int16Encoder object.
+
+        Parameters:
+            limit (float): Maximum absolute value of encoded coordinates (e.g. taken from the plot ranges).
+        """
+        self.scale = max(float(limit), np.finfo(np.float32).tiny) / 32767
+
+    def encode(self, array: np.ndarray) -> str:
+        """
+        Encode array as base64 little-endian int16 buffer quantized to limit / 32767.
+
+        It overrides the abstract method encode.
+        """
+        return Float32Encoder.describe(
+            self.quantize(array), "int16", self.scale
+        )
+
+    def encode_rows(self, values: np.ndarray, lengths: np.ndarray) -> str:
+        """
+        Encode rows as one base64 little-endian int16 buffer with the lengths of the rows.
+
+        It overrides the method encode_rows.
+        """
+        return Float32Encoder.describe(
+            self.quantize(values), "int16", self.scale, lengths
+        )
+
+    def quantize(self, array: np.ndarray) -> np.ndarray:
+        """
+        Quantize coordinates to limit / 32767.
+
+        Parameters:
+            array (np.ndarray): Array of coordinates.
+
+        Returns:
+            np.ndarray: Little-endian int16 array of the quantized coordinates.
+        """
+        quantized = np.clip(
+            np.rint(np.asarray(array) / self.scale), -32767, 32767
+        )
+        return np.ascontiguousarray(quantized, dtype="<i2")
+
+
+# Available payload encodings (name -> encoder class)
+encoders = {
+    "text": TextEncoder,
+    "float32": Float32Encoder,
+    "int16": Int16Encoder,
+}
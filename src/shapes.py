@@ -1,16 +1,20 @@
 from abc import ABC, abstractmethod
+from functools import lru_cache
 
 import numpy as np
 
 
 class Shape(ABC):
     @abstractmethod
-    def get_borders(self, quality: int) -> tuple[np.ndarray, np.ndarray]:
+    def get_borders(
+        self, quality: int, dtype: np.dtype = np.float64
+    ) -> tuple[np.ndarray, np.ndarray]:
         """
         Abstract method to calculate the borders of a shape.
 
         Parameters:
             quality (int): The number of points to generate along the border.
+            dtype (np.dtype, optional): Type of the coordinates. Default is np.float64.
 
         Returns:
             tuple: Tuple containing the x and y coordinates of the shape's border.
@@ -23,6 +27,7 @@ class Shape(ABC):
         t: float | np.ndarray,
         speed: float,
         distance_to_border: float,
+        dtype: np.dtype = np.float64,
     ) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
         """
         Abstract method to define the parametric equation of a shape.
@@ -31,6 +36,8 @@ class Shape(ABC):
             t (float or np.ndarray): Parameter value or list of values for the parametric equation.
             speed (float): Speed factor for the parametric equation.
             distance_to_border (float): Distance from the point (pen, or hole in the shape) to the border of the shape.
+            dtype (np.dtype, optional): Type of the coordinates. Phases are always calculated
+                in float64 (see reduce_phase). Default is np.float64.
 
         Returns:
             tuple: Tuple containing the x and y coordinates calculated by the parametric equation.
@@ -39,6 +46,26 @@ class Shape(ABC):
 
         pass
 
+    @abstractmethod
+    def derivatives(
+        self,
+        t: float | np.ndarray,
+        speed: float,
+        distance_to_border: float,
+    ) -> tuple[float, float, float, float] | tuple[np.ndarray, ...]:
+        """
+        Abstract method to calculate the derivatives of the parametric equation with respect to t.
+
+        Parameters:
+            t (float or np.ndarray): Parameter value or list of values for the parametric equation.
+            speed (float): Speed factor for the parametric equation.
+            distance_to_border (float): Distance from the point (pen, or hole in the shape) to the border of the shape.
+
+        Returns:
+            tuple: Tuple containing the first (dx, dy) and the second (ddx, ddy) derivatives of the x and y coordinates.
+        """
+        pass
+
     @abstractmethod
     def circumference(self, distance_to_border: float) -> float:
         """
@@ -52,6 +79,16 @@ class Shape(ABC):
         """
         pass
 
+    @abstractmethod
+    def key(self) -> tuple:
+        """
+        Abstract method to describe the geometry of a shape (without color).
+
+        Returns:
+            tuple: Tuple containing the name of the shape and the parameters defining it.
+        """
+        pass
+
 
 class Circle(Shape):
     def __init__(self, radius: float, color: str):
@@ -67,30 +104,51 @@ class Circle(Shape):
         self.x_range = self.radius
         self.y_range = self.radius
 
-    def get_borders(self, quality: int = 100) -> tuple[np.ndarray, np.ndarray]:
+    def get_borders(
+        self, quality: int = 100, dtype: np.dtype = np.float64
+    ) -> tuple[np.ndarray, np.ndarray]:
         """
         Calculate the borders of the circle.
 
         It overrides the abstract method get_borders.
         """
         thetas = np.linspace(0, 2 * np.pi, quality)
-        return self.parametric_equation(thetas, speed=1, distance_to_border=0)
+        return self.parametric_equation(
+            thetas, speed=1, distance_to_border=0, dtype=dtype
+        )
 
     def parametric_equation(
         self,
         t: float | np.ndarray,
         speed: float,
         distance_to_border: float,
+        dtype: np.dtype = np.float64,
     ) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
         """
         Define the parametric equation of the circle.
 
         It overrides the abstract method parametric_equation.
         """
-        x = (self.radius + distance_to_border) * np.cos(speed * t)
-        y = (self.radius + distance_to_border) * np.sin(speed * t)
+        phase = reduce_phase(speed * t, dtype)
+        radius = np.asarray(self.radius + distance_to_border, dtype=dtype)
+        x = radius * np.cos(phase)
+        y = radius * np.sin(phase)
         return x, y
 
+    def derivatives(
+        self,
+        t: float | np.ndarray,
+        speed: float,
+        distance_to_border: float,
+    ) -> tuple[float, float, float, float] | tuple[np.ndarray, ...]:
+        """
+        Calculate the derivatives of the parametric equation of the circle.
+
+        It overrides the abstract method derivatives.
+        """
+        x, y = self.parametric_equation(t, speed, distance_to_border)
+        return -speed * y, speed * x, -(speed**2) * x, -(speed**2) * y
+
     def circumference(self, distance_to_border: float) -> float:
         """
         Calculate the circumference of the circle.
@@ -99,6 +157,14 @@ class Circle(Shape):
         """
         return 2 * np.pi * (self.radius + distance_to_border)
 
+    def key(self) -> tuple:
+        """
+        Describe the geometry of the circle.
+
+        It overrides the abstract method key.
+        """
+        return ("Circle", float(self.radius))
+
 
 class Elipse(Shape):
     def __init__(self, a: float, b: float, color: int):
@@ -117,49 +183,464 @@ class Elipse(Shape):
         self.x_range = self.a
         self.y_range = self.b
 
-    def get_borders(self, quality: int = 100) -> tuple:
+    def get_borders(
+        self, quality: int = 100, dtype: np.dtype = np.float64
+    ) -> tuple:
         """
         Calculate the borders of the ellipse.
 
         It overrides the abstract method get_borders.
         """
         thetas = np.linspace(0, 2 * np.pi, quality)
-        return self.parametric_equation(thetas, speed=1, distance_to_border=0)
+        return self.parametric_equation(
+            thetas, speed=1, distance_to_border=0, dtype=dtype
+        )
 
     def parametric_equation(
         self,
         t: float | np.ndarray,
         speed: float,
         distance_to_border: float,
+        dtype: np.dtype = np.float64,
     ) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
         """
-        Define the parametric equation of the circle.
+        Define the parametric equation of the curve at distance_to_border from the ellipse
+        (along its normal), moving with constant speed along the curve (one lap per 2 * pi / speed).
 
         It overrides the abstract method parametric_equation.
         """
+        u, _ = self.arc_length_parameter(speed * t, distance_to_border)
+        u = reduce_phase(u, dtype)
+        a, b, distance_to_border = (
+            np.asarray(value, dtype=dtype)
+            for value in (self.a, self.b, distance_to_border)
+        )
+        w = np.hypot(b * np.cos(u), a * np.sin(u))
 
-        x = (self.a + distance_to_border) * np.cos(speed * t)
-        y = (self.b + distance_to_border) * np.sin(speed * t)
+        x = (a + distance_to_border * b / w) * np.cos(u)
+        y = (b + distance_to_border * a / w) * np.sin(u)
         return x, y
 
+    def derivatives(
+        self,
+        t: float | np.ndarray,
+        speed: float,
+        distance_to_border: float,
+    ) -> tuple[float, float, float, float] | tuple[np.ndarray, ...]:
+        """
+        Calculate the derivatives of the parametric equation of the ellipse.
+        The curve moves with constant speed v = speed * length / (2 * pi), so the first derivative
+        is v times the unit tangent and the second one is v^2 times the curvature of the curve
+        towards the center. Where the distance inside is larger than the radius of curvature
+        (1 + distance_to_border * curvature < 0), the curve moves against the tangent of the ellipse
+        between cusps, at which its curvature is infinite.
+
+        It overrides the abstract method derivatives.
+        """
+        u, length = self.arc_length_parameter(speed * t, distance_to_border)
+        w = self.normal_length(u)
+        v = speed * length / (2 * np.pi)
+
+        tangent_x = -self.a * np.sin(u) / w
+        tangent_y = self.b * np.cos(u) / w
+        curvature = self.a * self.b / w**3
+        stretch = 1 + distance_to_border * curvature
+        curvature = curvature / stretch
+
+        direction = np.where(stretch < 0, -v, v)
+        dx, dy = direction * tangent_x, direction * tangent_y
+        # The normal towards the center is the tangent rotated by 90 degrees
+        ddx = -(v**2) * curvature * tangent_y
+        ddy = (v**2) * curvature * tangent_x
+        return dx, dy, ddx, ddy
+
     def circumference(self, distance_to_border: float) -> float:
         """
-        Calculate the circumference of the circle using Ramanuja Formula.
+        Calculate the length of the curve at distance_to_border from the ellipse
+        from the arc length table.
 
         It overrides the abstract method circumference.
         """
-        return np.pi * (
-            3 * (self.a + self.b + 2 * distance_to_border)
-            - np.sqrt(
-                (
-                    3 * (self.a + distance_to_border)
-                    + self.b
-                    + distance_to_border
-                )
-                * (
-                    self.a
-                    + distance_to_border
-                    + 3 * (self.b + distance_to_border)
-                )
+        _, lengths = arc_length_table(
+            float(self.a), float(self.b), float(distance_to_border)
+        )
+        return lengths[-1]
+
+    def normal_length(self, u: float | np.ndarray) -> float | np.ndarray:
+        """
+        Calculate the length of the normal (b * cos(u), a * sin(u)) of the ellipse at parameter u,
+        which is also the length of the tangent (-a * sin(u), b * cos(u)).
+
+        Parameters:
+            u (float or np.ndarray): Parameter of the ellipse (a * cos(u), b * sin(u)).
+
+        Returns:
+            float or np.ndarray: Length of the normal.
+        """
+        return np.hypot(self.b * np.cos(u), self.a * np.sin(u))
+
+    def arc_length_parameter(
+        self,
+        phase: float | np.ndarray,
+        distance_to_border: float | np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find parameters u of the ellipse (a * cos(u), b * sin(u)) at which the curve at
+        distance_to_border from the ellipse covers phase / (2 * pi) of its length.
+
+        Parameters:
+            phase (float or np.ndarray): Angle (2 * pi is the whole lap).
+            distance_to_border (float or np.ndarray): Distance from the ellipse
+                (an array broadcastable with phase, e.g. one value for each row of phase).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Tuple containing parameters u
+            and lengths of the curves (broadcasted to the shape of phase).
+        """
+        phase = np.asarray(phase, dtype=float)
+        turns = np.floor(phase / (2 * np.pi))
+        fraction = phase / (2 * np.pi) - turns
+
+        if np.ndim(distance_to_border) == 0:
+            grid, lengths = arc_length_table(
+                float(self.a), float(self.b), float(distance_to_border)
+            )
+            u = np.interp(fraction * lengths[-1], lengths, grid)
+            length = np.full(phase.shape, lengths[-1])
+            return u + 2 * np.pi * turns, length
+
+        fraction, offset = np.broadcast_arrays(fraction, distance_to_border)
+        turns = np.broadcast_to(turns, fraction.shape)
+        u = np.empty(fraction.shape)
+        length = np.empty(fraction.shape)
+        for value in np.unique(offset):
+            grid, lengths = arc_length_table(
+                float(self.a), float(self.b), float(value)
+            )
+            mask = offset == value
+            u[mask] = np.interp(fraction[mask] * lengths[-1], lengths, grid)
+            length[mask] = lengths[-1]
+
+        return u + 2 * np.pi * turns, length
+
+    def key(self) -> tuple:
+        """
+        Describe the geometry of the ellipse.
+
+        It overrides the abstract method key.
+        """
+        return ("Elipse", float(self.a), float(self.b))
+
+
+class SampledPathShape(Shape):
+    def __init__(self, points: np.ndarray, color: int, samples: int = 1024):
+        """
+        Initialize a SampledPathShape object - any closed outline given by its points
+        (e.g. loaded from a file or sampled from Bézier curves, see from_bezier).
+
+        The outline is resampled once into samples points equally spaced along its length,
+        centered at the middle of its bounding box and oriented counterclockwise,
+        and its unit tangents, outer normals and curvature are stored in arrays.
+        Offset curves (see offset_table) are calculated once for each distance, so the parametric
+        equation is a lookup by linear interpolation, for all time parameters at once.
+
+        Parameters:
+            points (np.ndarray): (n, 2) array of points of the closed outline
+                (the last point may repeat the first one).
+            color (int): The color of the shape.
+            samples (int, optional): Number of points of the resampled outline. Default is 1024.
+        """
+        points = np.asarray(points, dtype=float)
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError("The outline must be a list of [x, y] points")
+        if not np.isfinite(points).all():
+            raise ValueError("Points of the outline must be finite")
+        if len(points) and np.allclose(points[0], points[-1]):
+            points = points[:-1]
+        if len(points) < 3:
+            raise ValueError("The outline needs at least 3 points")
+
+        # Resample the closed polyline uniformly along its length
+        closed = np.vstack((points, points[:1]))
+        lengths = np.concatenate(
+            ([0], np.cumsum(np.hypot(*np.diff(closed, axis=0).T)))
+        )
+        s = np.arange(samples) * (lengths[-1] / samples)
+        points = np.column_stack(
+            (
+                np.interp(s, lengths, closed[:, 0]),
+                np.interp(s, lengths, closed[:, 1]),
+            )
+        )
+        points -= (points.min(axis=0) + points.max(axis=0)) / 2
+        # Shoelace formula, negative area means clockwise
+        x, y = points.T
+        area = np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)
+        if np.isclose(area, 0, rtol=0, atol=1e-9 * lengths[-1] ** 2):
+            raise ValueError("The outline must enclose an area")
+        if area < 0:
+            points = points[::-1]
+
+        self.points = points
+        self.color = color
+        self.x_range = float(np.abs(points[:, 0]).max())
+        self.y_range = float(np.abs(points[:, 1]).max())
+
+        tangents = np.roll(points, -1, axis=0) - np.roll(points, 1, axis=0)
+        self.tangents = tangents / np.hypot(*tangents.T)[:, None]
+        # Outer normals of the counterclockwise outline
+        self.normals = np.column_stack(
+            (self.tangents[:, 1], -self.tangents[:, 0])
+        )
+        self.offsets = {}
+        # Curvature as the change of the tangent angle over 1/256 of the outline around each point
+        # (second differences of neighbouring points amplify the error of the sampled outline)
+        width = max(samples // 256, 1)
+        spacing = self.circumference(0) / samples
+        angles = np.arctan2(self.tangents[:, 1], self.tangents[:, 0])
+        turns = np.angle(
+            np.exp(1j * (np.roll(angles, -width) - np.roll(angles, width)))
+        )
+        self.curvature = turns / (2 * width * spacing)
+
+    @classmethod
+    def from_bezier(
+        cls,
+        curves: np.ndarray,
+        color: int,
+        points_per_curve: int = 64,
+        samples: int = 1024,
+    ) -> "SampledPathShape":
+        """
+        Create the shape from a closed outline of cubic Bézier curves.
+
+        Parameters:
+            curves (np.ndarray): (n, 4, 2) array of control points of the consecutive curves
+                (each curve starts at the end of the previous one).
+            color (int): The color of the shape.
+            points_per_curve (int, optional): Number of points sampled on each curve. Default is 64.
+            samples (int, optional): Number of points of the resampled outline. Default is 1024.
+
+        Returns:
+            SampledPathShape: The shape.
+        """
+        curves = np.asarray(curves, dtype=float)
+        u = np.linspace(0, 1, points_per_curve, endpoint=False)[:, None, None]
+        bernstein = np.stack(
+            (
+                (1 - u) ** 3,
+                3 * (1 - u) ** 2 * u,
+                3 * (1 - u) * u**2,
+                u**3,
             )
         )
+        # (points_per_curve, n, 2) points of all curves, ordered curve by curve
+        points = np.einsum("kpij,ikj->pij", bernstein, curves)
+        return cls(points.transpose(1, 0, 2).reshape(-1, 2), color, samples)
+
+    def offset_table(
+        self, distance_to_border: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calculate the closed curve at distance_to_border from the outline (along its outer normals)
+        and its cumulative arc length. Tables are memoized for each distance.
+
+        Parameters:
+            distance_to_border (float): Distance from the outline (negative inside).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Tuple containing arc lengths from the first point
+            (the last one is the length of the whole curve) and x and y coordinates of the points
+            of the curve (the first point repeated at the end).
+        """
+        distance_to_border = float(distance_to_border)
+        if distance_to_border not in self.offsets:
+            points = self.points + distance_to_border * self.normals
+            points = np.vstack((points, points[:1]))
+            lengths = np.concatenate(
+                ([0], np.cumsum(np.hypot(*np.diff(points, axis=0).T)))
+            )
+            for array in (lengths, points):
+                array.flags.writeable = False
+            self.offsets[distance_to_border] = (
+                lengths,
+                points[:, 0],
+                points[:, 1],
+            )
+        return self.offsets[distance_to_border]
+
+    def lookup(
+        self,
+        phase: float | np.ndarray,
+        distance_to_border: float | np.ndarray,
+        tables: list[str],
+    ) -> list[np.ndarray]:
+        """
+        Interpolate arrays of the curve at distance_to_border at the points which cover
+        phase / (2 * pi) of its length.
+
+        Parameters:
+            phase (float or np.ndarray): Angle (2 * pi is the whole lap).
+            distance_to_border (float or np.ndarray): Distance from the outline
+                (an array broadcastable with phase, e.g. one value for each row of phase).
+            tables (list[str]): Names of the interpolated arrays: "x", "y" (the offset curve),
+                "tangent_x", "tangent_y", "curvature" (of the outline) or "length" (of the whole curve).
+
+        Returns:
+            list[np.ndarray]: Interpolated arrays in the order of tables (broadcasted to the shape of phase).
+        """
+        phase = np.asarray(phase, dtype=float)
+        fraction = np.remainder(phase / (2 * np.pi), 1)
+        fraction, offset = np.broadcast_arrays(fraction, distance_to_border)
+        results = [np.empty(fraction.shape) for _ in tables]
+        for value in np.unique(offset):
+            lengths, x, y = self.offset_table(value)
+            mask = offset == value if np.ndim(offset) else Ellipsis
+            s = fraction[mask] * lengths[-1]
+            for result, name in zip(results, tables):
+                if name == "length":
+                    result[mask] = lengths[-1]
+                    continue
+                if name in ("x", "y"):
+                    values = x if name == "x" else y
+                else:
+                    values = {
+                        "tangent_x": self.tangents[:, 0],
+                        "tangent_y": self.tangents[:, 1],
+                        "curvature": self.curvature,
+                    }[name]
+                    values = np.append(values, values[0])
+                result[mask] = np.interp(s, lengths, values)
+        return results
+
+    def get_borders(
+        self, quality: int = 100, dtype: np.dtype = np.float64
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate the borders of the shape.
+
+        It overrides the abstract method get_borders.
+        """
+        thetas = np.linspace(0, 2 * np.pi, quality)
+        return self.parametric_equation(
+            thetas, speed=1, distance_to_border=0, dtype=dtype
+        )
+
+    def parametric_equation(
+        self,
+        t: float | np.ndarray,
+        speed: float,
+        distance_to_border: float,
+        dtype: np.dtype = np.float64,
+    ) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
+        """
+        Define the parametric equation of the curve at distance_to_border from the outline
+        (along its normal), moving with constant speed along the curve (one lap per 2 * pi / speed).
+
+        It overrides the abstract method parametric_equation.
+        """
+        x, y = self.lookup(speed * t, distance_to_border, ["x", "y"])
+        return x.astype(dtype, copy=False), y.astype(dtype, copy=False)
+
+    def derivatives(
+        self,
+        t: float | np.ndarray,
+        speed: float,
+        distance_to_border: float,
+    ) -> tuple[float, float, float, float] | tuple[np.ndarray, ...]:
+        """
+        Calculate the derivatives of the parametric equation of the shape
+        (like Elipse.derivatives, with the tangents and curvature interpolated from the tables).
+
+        It overrides the abstract method derivatives.
+        """
+        tangent_x, tangent_y, curvature, length = self.lookup(
+            speed * t,
+            distance_to_border,
+            ["tangent_x", "tangent_y", "curvature", "length"],
+        )
+        norm = np.hypot(tangent_x, tangent_y)
+        tangent_x, tangent_y = tangent_x / norm, tangent_y / norm
+        stretch = 1 + distance_to_border * curvature
+        curvature = curvature / stretch
+        v = speed * length / (2 * np.pi)
+
+        direction = np.where(stretch < 0, -v, v)
+        dx, dy = direction * tangent_x, direction * tangent_y
+        ddx = -(v**2) * curvature * tangent_y
+        ddy = (v**2) * curvature * tangent_x
+        return dx, dy, ddx, ddy
+
+    def circumference(self, distance_to_border: float) -> float:
+        """
+        Calculate the length of the curve at distance_to_border from the outline
+        from the offset table.
+
+        It overrides the abstract method circumference.
+        """
+        lengths, _, _ = self.offset_table(distance_to_border)
+        return lengths[-1]
+
+    def key(self) -> tuple:
+        """
+        Describe the geometry of the shape by the points of the resampled outline.
+
+        It overrides the abstract method key.
+        """
+        return ("SampledPath", tuple(map(tuple, self.points.tolist())))
+
+
+def reduce_phase(
+    phase: float | np.ndarray, dtype: np.dtype
+) -> float | np.ndarray:
+    """
+    Convert phase (calculated in float64) to the type of the coordinates.
+
+    After hundreds of rotations float32 cannot represent the phase within a pixel of the drawing,
+    so the phase is first reduced to [0, 2 * pi) in float64, and only the trigonometric
+    functions of it are calculated in float32.
+
+    Parameters:
+        phase (float or np.ndarray): Angle or list of angles.
+        dtype (np.dtype): Type of the coordinates.
+
+    Returns:
+        float or np.ndarray: Phase unchanged for float64, reduced and converted otherwise.
+    """
+    if np.dtype(dtype) == np.float64:
+        return phase
+    return np.remainder(phase, 2 * np.pi).astype(dtype)
+
+
+@lru_cache(maxsize=256)
+def arc_length_table(
+    a: float, b: float, distance_to_border: float, samples: int = 4096
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate cumulative arc length of the curve at distance_to_border (along the normal)
+    from the ellipse (a * cos(u), b * sin(u)). Tables are memoized for each ellipse and distance.
+
+    The speed of the curve is |E'(u)| * (1 + distance_to_border * curvature(u)) = w + distance_to_border * a * b / w^2,
+    where w = |E'(u)|, and it is integrated with the trapezoidal rule.
+
+    Parameters:
+        a (float): Half of the width of the ellipse.
+        b (float): Half of the height of the ellipse.
+        distance_to_border (float): Distance from the ellipse (negative inside).
+        samples (int, optional): Number of intervals of the table. Default is 4096.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Tuple containing parameters u from 0 to 2 * pi and arc lengths
+        of the curve from u = 0. The last arc length is the length of the whole curve.
+    """
+    grid = np.linspace(0, 2 * np.pi, samples + 1)
+    w = np.hypot(b * np.cos(grid), a * np.sin(grid))
+    speed = np.abs(w + distance_to_border * a * b / w**2)
+
+    lengths = np.empty_like(grid)
+    lengths[0] = 0
+    np.cumsum((speed[1:] + speed[:-1]) / 2 * np.diff(grid), out=lengths[1:])
+
+    grid.flags.writeable = False
+    lengths.flags.writeable = False
+    return grid, lengths
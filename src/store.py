@@ -0,0 +1,209 @@
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from threading import Lock
+from uuid import uuid4
+
+import numpy as np
+
+from src.cache import canonical_hash
+from src.const_params import trajectory_store_bytes
+from src.metrics import instrumentation
+from src.motions import CircleMotion
+
+# Bump when the calculation of trajectories changes, so stored trajectories are not reused
+STORE_VERSION = "trajectory-v1"
+ARRAYS = ("x", "y", "x_center", "y_center")
+
+
+class TrajectoryStore:
+    """
+    On-disk store of motion trajectories shared by all processes using the same directory.
+
+    Every trajectory is a directory named by the hash of the motion parameters with the arrays
+    x, y, x_center, y_center and the number of rotations as .npy files. Arrays are loaded as read-only
+    memory maps, so a hit costs a page cache read. Directories are written under a temporary name
+    and renamed, so readers never see a partial trajectory. The total size is bounded by evicting
+    the least recently used trajectories (by modification time of the directories, updated on hits).
+    The store is scanned for eviction only when an estimate of its size (the size found by the last scan
+    and the trajectories saved since) is over the limit, or when the last scan is older than rescan_seconds,
+    so files saved by other processes are counted too.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        rescan_seconds: float = 60,
+        stale_seconds: float = 600,
+    ):
+        """
+        Initialize TrajectoryStore object.
+
+        Parameters:
+            directory (str): Directory of the store (created if missing).
+            max_bytes (int): Maximum total size of the stored files.
+            rescan_seconds (float, optional): Maximum time between scans of the store. Default is 60.
+            stale_seconds (float, optional): Age of a temporary directory after which it is treated
+                as left by a crashed process and removed. Default is 600.
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        self.stale_seconds = stale_seconds
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+        # Estimated total size of the store and time of its last scan (None before the first one)
+        self.size = 0
+        self.scanned = None
+
+    def path(self, motion: CircleMotion) -> Path:
+        """
+        Get directory of the trajectory of the motion.
+
+        Parameters:
+            motion (CircleMotion): The motion.
+
+        Returns:
+            Path: Directory of the trajectory (it may not exist).
+        """
+        return self.directory / canonical_hash(STORE_VERSION, motion.key())
+
+    def load(self, motion: CircleMotion) -> bool:
+        """
+        Load stored trajectory and number of rotations into the motion (as its cached stages).
+
+        Parameters:
+            motion (CircleMotion): The motion.
+
+        Returns:
+            bool: True if the trajectory was stored.
+        """
+        path = self.path(motion)
+        with instrumentation.span("store.load") as span:
+            try:
+                arrays = tuple(
+                    np.load(path / f"{name}.npy", mmap_mode="r")
+                    for name in ARRAYS
+                )
+                rotations = int(np.load(path / "rotations.npy"))
+                # Mark the trajectory as recently used
+                os.utime(path)
+            except (FileNotFoundError, ValueError):
+                # Missing, or evicted by another process while it was read
+                with self.lock:
+                    self.misses += 1
+                return False
+            span.bytes = sum(array.nbytes for array in arrays)
+
+        with self.lock:
+            self.hits += 1
+        motion.set_stage("rotations", rotations)
+        motion.set_stage("trajectory", arrays)
+        return True
+
+    def save(self, motion: CircleMotion):
+        """
+        Store trajectory and number of rotations of the motion (calculated if needed)
+        and evict least recently used trajectories above the size limit.
+
+        Parameters:
+            motion (CircleMotion): The motion.
+        """
+        path = self.path(motion)
+        if path.exists():
+            return
+
+        with instrumentation.span("store.save") as span:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temporary = self.directory / f".tmp-{uuid4().hex}"
+            temporary.mkdir()
+            for name, array in zip(ARRAYS, motion.trajectory):
+                np.save(temporary / f"{name}.npy", array)
+            span.bytes = sum(array.nbytes for array in motion.trajectory)
+            np.save(temporary / "rotations.npy", motion.rotations)
+            size = sum(f.stat().st_size for f in os.scandir(temporary))
+
+            try:
+                temporary.rename(path)
+            except OSError:
+                # Another process has stored the same trajectory in the meantime
+                shutil.rmtree(temporary, ignore_errors=True)
+                return
+
+        with self.lock:
+            self.size += size
+            due = (
+                self.scanned is None
+                or self.size > self.max_bytes
+                or time.time() - self.scanned > self.rescan_seconds
+            )
+        if due:
+            self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used trajectories until the total size is below the limit.
+        Temporary directories older than stale_seconds (left by crashed processes) are removed,
+        and newer ones (being written) are counted in the total size.
+        """
+        now = time.time()
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                modified = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if entry.name.startswith("."):
+                if now - modified > self.stale_seconds:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    total += size
+                continue
+            entries.append((modified, size, entry.path))
+            total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # Rename first, so no process loads a partially removed trajectory.
+            # Memory maps opened before keep working after the files are removed.
+            removed = Path(path).with_name(f".tmp-{uuid4().hex}")
+            try:
+                os.rename(path, removed)
+            except OSError:
+                continue
+            shutil.rmtree(removed, ignore_errors=True)
+            total -= size
+
+        with self.lock:
+            self.size = total
+            self.scanned = now
+
+    def stats(self) -> dict:
+        """
+        Get statistics of the store.
+
+        Returns:
+            dict: Dictionary with number of hits and misses of this process.
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+# Store shared by all processes of the host (e.g. Streamlit replicas),
+# its directory can be changed with the SPIROGRAPH_STORE environment variable
+trajectory_store = TrajectoryStore(
+    os.environ.get(
+        "SPIROGRAPH_STORE",
+        os.path.join(tempfile.gettempdir(), "spirograph-trajectories"),
+    ),
+    trajectory_store_bytes,
+)
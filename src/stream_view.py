@@ -0,0 +1,78 @@
+from pathlib import Path
+from typing import Iterator
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# Front-end of the streamed drawing, which loads the page once and appends the chunks to it
+stream_directory = Path(__file__).parent / "html_views" / "stream"
+stream_component = components.declare_component(
+    "stream", path=str(stream_directory)
+)
+
+
+class StreamView:
+
+    def __init__(
+        self, key: str = "stream", window: int = 4, height: int = 2000
+    ):
+        """
+        Initialize StreamView object.
+
+        Parameters:
+            key (str, optional): Key of the component, its state is kept under the same key
+                with the "-parts" suffix. Default is "stream".
+            window (int, optional): Number of chunks sent at once (and kept until the page appends them).
+                Default is 4.
+            height (int, optional): Height of the drawing in pixels. Default is 2000.
+        """
+        self.key = key
+        self.window = window
+        self.height = height
+
+    def show(self, parts: Iterator[str]):
+        """
+        Show the drawing streamed in parts (see DrawController.stream_html).
+
+        The first part (the page) is loaded by the component once, and every chunk is sent
+        to the same component only once. The component reports the number of the chunks
+        it appended, which reruns the fragment sending the next ones, so chunks appended
+        by the page are dropped and the iframe is never reloaded.
+
+        Parameters:
+            parts (Iterator[str]): Parts of the HTML file, the page and the chunks.
+        """
+        # The value of the component from the previous drawing is not its progress
+        st.session_state.pop(self.key, None)
+        st.session_state[f"{self.key}-parts"] = {
+            "page": next(parts),
+            "parts": parts,
+            "chunks": [],
+            "first": 0,
+        }
+        self.stream()
+
+    @st.fragment
+    def stream(self):
+        """
+        Send the chunks following the ones appended by the page (a fragment rerun by the component).
+        """
+        state = st.session_state[f"{self.key}-parts"]
+        # Number of the chunks appended by the page (None until the page is loaded)
+        appended = st.session_state.get(self.key)
+        if appended is not None:
+            del state["chunks"][: appended - state["first"]]
+            state["first"] = max(state["first"], appended)
+        while len(state["chunks"]) < self.window:
+            chunk = next(state["parts"], None)
+            if chunk is None:
+                break
+            state["chunks"].append(chunk)
+        stream_component(
+            page=state["page"] if appended is None else None,
+            chunks=state["chunks"],
+            first=state["first"],
+            height=self.height,
+            key=self.key,
+            default=None,
+        )
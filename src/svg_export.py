@@ -0,0 +1,140 @@
+from typing import Iterable, TextIO
+
+import numpy as np
+
+from src.controllers import DrawController
+
+
+class SvgExporter:
+    """Writes drawings of DrawController as compact SVG files."""
+
+    def __init__(
+        self,
+        controller: DrawController,
+        precision: int | None = None,
+        line_width: float = 2.0,
+        resolution: int = 1000,
+        chunk_size: int = 4096,
+    ):
+        """
+        Initialize SvgExporter object.
+
+        Parameters:
+            controller (DrawController): Controller of the drawing.
+            precision (int, optional): Number of decimal digits of the coordinates. Default is None
+                (the fewest digits which resolve one pixel of a resolution-sized image of the plot ranges).
+            line_width (float, optional): Width of the lines in pixels of a resolution-sized image. Default is 2.
+            resolution (int, optional): Number of pixels along the longer side of the image. Default is 1000.
+            chunk_size (int, optional): Number of points formatted at once. Default is 4096.
+        """
+        self.controller = controller
+        if precision is None:
+            x_range, y_range = controller.get_ranges()
+            span = max(x_range[1] - x_range[0], y_range[1] - y_range[0])
+            pixel = span / resolution if span > 0 else 1
+            precision = max(int(np.ceil(-np.log10(pixel))), 0)
+        # Coordinates are written as integers in units of 10^-precision
+        self.scale = 10**precision
+        self.line_width = line_width
+        self.resolution = resolution
+        self.chunk_size = chunk_size
+
+    def write(self, stream: TextIO):
+        """
+        Write the SVG file with the orbit borders (if shown) and pen movements to the stream.
+
+        Parameters:
+            stream (TextIO): Text stream (e.g. an opened file).
+        """
+        x_range, y_range = self.controller.get_ranges()
+        # y axis of SVG points down, so y coordinates are negated
+        left = round(x_range[0] * self.scale)
+        top = round(-y_range[1] * self.scale)
+        width = round((x_range[1] - x_range[0]) * self.scale)
+        height = round((y_range[1] - y_range[0]) * self.scale)
+        stroke = self.line_width * max(width, height) / self.resolution
+
+        stream.write(
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            f'viewBox="{left} {top} {width} {height}" '
+            f'fill="none" stroke-width="{stroke:.4g}" '
+            'stroke-linejoin="round" stroke-linecap="round">\n'
+        )
+
+        b_x, b_y = self.controller.get_borders()
+        if len(b_x):
+            self.write_path(stream, [(b_x, b_y)], self.controller.orbit.color)
+
+        movements_x, movements_y = self.controller.get_points_movements()
+        for xs, ys, color in zip(
+            movements_x, movements_y, self.controller.get_colors()
+        ):
+            self.write_path(stream, self.split(xs, ys), color)
+
+        stream.write("</svg>\n")
+
+    def split(
+        self, xs: np.ndarray, ys: np.ndarray
+    ) -> Iterable[tuple[np.ndarray, np.ndarray]]:
+        """
+        Split coordinates into chunks of chunk_size points.
+
+        Parameters:
+            xs (np.ndarray): x coordinates.
+            ys (np.ndarray): y coordinates.
+
+        Returns:
+            Iterable[tuple[np.ndarray, np.ndarray]]: Chunks of x and y coordinates.
+        """
+        for start in range(0, len(xs), self.chunk_size):
+            end = start + self.chunk_size
+            yield xs[start:end], ys[start:end]
+
+    def write_path(
+        self,
+        stream: TextIO,
+        chunks: Iterable[tuple[np.ndarray, np.ndarray]],
+        color: int,
+    ):
+        """
+        Write a polyline as an SVG path with relative commands.
+
+        Coordinates are quantized to the precision and written as differences
+        to the previous point (the first point with an absolute move), so most numbers have
+        one or two digits. Points equal to the previous one after quantization are skipped.
+        Chunks are formatted and written one by one, so the whole path is never built in memory.
+
+        Parameters:
+            stream (TextIO): Text stream.
+            chunks (Iterable[tuple[np.ndarray, np.ndarray]]): Chunks of x and y coordinates of the polyline.
+            color (int): Color of the path (0xRRGGBB).
+        """
+        stream.write(f'<path stroke="#{color:06x}" d="')
+
+        last = None
+        separator = "l"
+        for xs, ys in chunks:
+            points = np.column_stack(
+                (
+                    np.rint(np.asarray(xs) * self.scale),
+                    np.rint(-np.asarray(ys) * self.scale),
+                )
+            ).astype(np.int64)
+            if not len(points):
+                continue
+
+            if last is None:
+                stream.write(f"M{points[0, 0]} {points[0, 1]}")
+                last = points[0]
+                points = points[1:]
+
+            deltas = np.diff(points, axis=0, prepend=last[None])
+            deltas = deltas[deltas.any(axis=1)]
+            last = points[-1] if len(points) else last
+            if len(deltas):
+                # Minus sign separates numbers in SVG paths, so spaces before it are redundant
+                text = " ".join(map(str, deltas.ravel().tolist()))
+                stream.write(separator + text.replace(" -", "-"))
+                separator = " "
+
+        stream.write('"/>\n')
@@ -0,0 +1,181 @@
+import numpy as np
+
+from src.metrics import instrumented
+from src.motions import CircleMotion
+from src.raster import Rasterizer
+from src.shapes import Circle, Shape
+
+
+class ParameterSweep:
+    """
+    Calculates drawings of a grid of circle parameters rolling on one orbit in one NumPy pass
+    and draws them as thumbnails of a contact sheet.
+    """
+
+    def __init__(
+        self,
+        orbit: Shape,
+        radii: np.ndarray,
+        pen_ratios: np.ndarray,
+        outer: tuple[bool, ...] = (False, True),
+        quality: int = 10000,
+        samples_per_turn: int = 16,
+        dtype: np.dtype = np.float64,
+    ):
+        """
+        Initialize ParameterSweep object.
+
+        Parameters:
+            orbit (Shape): Orbit shared by all drawings.
+            radii (np.ndarray): Radii of the circle.
+            pen_ratios (np.ndarray): Distances from the pen to the center of the circle
+                relative to its radius (1 is the border).
+            outer (tuple[bool, ...], optional): Directions of the roll. Default is both (inner and outer).
+            quality (int, optional): Maximum number of points of each drawing. Default is 10000.
+            samples_per_turn (int, optional): Number of points per turn of the pen around its circle
+                (of the drawing with the most turns). Default is 16.
+            dtype (np.dtype, optional): Type of the calculated coordinates. Default is np.float64.
+
+        Drawings are ordered by direction, radius and pen ratio, so rows of the contact sheet
+        are the circles (direction and radius) and its columns are the pen ratios.
+        """
+        self.orbit = orbit
+        self.radii = np.asarray(radii, dtype=float)
+        self.pen_ratios = np.asarray(pen_ratios, dtype=float)
+        self.outer = tuple(outer)
+        self.quality = quality
+        self.samples_per_turn = samples_per_turn
+        self.dtype = np.dtype(dtype)
+
+        # One motion of each circle (with the farthest pen, which needs the most rotations to close)
+        self.motions = [
+            CircleMotion(
+                orbit,
+                Circle(radius, color=None),
+                radius * (1 - self.pen_ratios.max()),
+                circle_outer,
+                quality=quality,
+                dtype=dtype,
+            )
+            for circle_outer in self.outer
+            for radius in self.radii
+        ]
+
+    @property
+    def parameters(self) -> list[dict]:
+        """Parameters of the drawings (radius, pen_distance and outer) in the order of the rows of x and y."""
+        return [
+            {
+                "radius": float(m.circle.radius),
+                "pen_distance": float(m.circle.radius * ratio),
+                "outer": m.direction == 1,
+            }
+            for m in self.motions
+            for ratio in self.pen_ratios
+        ]
+
+    @instrumented("sweep.compute")
+    def compute(self):
+        """
+        Calculate all drawings of the grid.
+
+        Drawings of the same circle differ only by the pen distance, so the orbit (position of the circle center)
+        and the rotation of the circle are evaluated once per circle on the (n_circles, samples) array,
+        and the pens of all pen ratios are broadcast from them. Results are stored in x and y
+        attributes as (n_drawings, samples) arrays.
+        """
+        rotations = np.array([m.rotations for m in self.motions])
+        turns = rotations * np.array(
+            [abs(m.circle_speed) + m.orbit_speed for m in self.motions]
+        )
+        n_samples = int(
+            min(self.samples_per_turn * turns.max() + 1, self.quality)
+        )
+        samples = np.linspace(0, 1, n_samples)
+        thetas = np.outer(rotations * 2 * np.pi, samples)
+
+        def column(values):
+            return np.array(values, dtype=float)[:, None]
+
+        radius = column([m.circle.radius for m in self.motions])
+        direction = column([m.direction for m in self.motions])
+        circle_speed = column([m.circle_speed for m in self.motions])
+        orbit_speed = column([m.orbit_speed for m in self.motions])
+
+        x_center, y_center = self.orbit.parametric_equation(
+            thetas, orbit_speed, direction * radius, dtype=self.dtype
+        )
+        x_unit, y_unit = Circle(1, color=None).parametric_equation(
+            thetas, circle_speed, 0, dtype=self.dtype
+        )
+
+        # (n_circles, n_pen_ratios, 1) distances of the pens from the circle centers
+        pen = (radius * self.pen_ratios)[..., None].astype(self.dtype)
+        self.x = (x_center[:, None] + pen * x_unit[:, None]).reshape(
+            -1, n_samples
+        )
+        self.y = (y_center[:, None] + pen * y_unit[:, None]).reshape(
+            -1, n_samples
+        )
+
+    @instrumented("sweep.contact_sheet")
+    def contact_sheet(
+        self,
+        color: int,
+        tile: int = 96,
+        line_width: float = 1.0,
+        batch_size: int = 16,
+    ) -> Rasterizer:
+        """
+        Draw all drawings as thumbnails of one image.
+
+        Each drawing is scaled to fit its tile and moved to the tile center. Drawings stay inside
+        their tiles, so the sheet is drawn in bands of whole rows of tiles (with at most batch_size
+        drawings each) and every band is copied into the sheet. Memory of the rasterization
+        is bounded by the band instead of growing with the number of drawings.
+
+        Parameters:
+            color (int): Color of the drawings (0xRRGGBB).
+            tile (int, optional): Size of the tile of each drawing in pixels. Default is 96.
+            line_width (float, optional): Width of the lines in pixels. Default is 1.
+            batch_size (int, optional): Maximum number of drawings rasterized at once
+                (at least one row of tiles). Default is 16.
+
+        Returns:
+            Rasterizer: Image with len(outer) * len(radii) rows and len(pen_ratios) columns of thumbnails.
+        """
+        if not hasattr(self, "x"):
+            self.compute()
+
+        columns = len(self.pen_ratios)
+        rows = len(self.motions)
+        sheet = Rasterizer(
+            [0, columns * tile],
+            [-rows * tile, 0],
+            max(columns, rows) * tile,
+            line_width,
+        )
+
+        band_rows = max(batch_size // columns, 1)
+        for top in range(0, rows, band_rows):
+            bottom = min(top + band_rows, rows)
+            band = Rasterizer(
+                [0, columns * tile],
+                [-bottom * tile, -top * tile],
+                max(columns, bottom - top) * tile,
+                line_width,
+            )
+            xs = self.x[top * columns : bottom * columns]
+            ys = self.y[top * columns : bottom * columns]
+            extent = np.maximum(np.abs(xs).max(axis=1), np.abs(ys).max(axis=1))
+            scale = (tile / 2 - line_width - 1) / np.maximum(extent, 1e-9)
+            row, col = np.divmod(np.arange(len(xs)), columns)
+            band.draw_polyline(
+                xs * scale[:, None] + ((col + 0.5) * tile)[:, None],
+                ys * scale[:, None] - ((top + row + 0.5) * tile)[:, None],
+                color,
+            )
+            # Pixels of the band are the rows of its tiles in the sheet
+            sheet.rgb[top * tile : bottom * tile] = band.rgb
+            sheet.alpha[top * tile : bottom * tile] = band.alpha
+        return sheet
@@ -0,0 +1,74 @@
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+
+# Placeholder of a named parameter in the template, e.g. {{ speed }}
+placeholder = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class PageTemplate:
+    """HTML template with named {{ parameter }} placeholders, parsed once into its literal parts."""
+
+    def __init__(self, source: str):
+        """
+        Initialize PageTemplate object.
+
+        Parameters:
+            source (str): Text of the template.
+        """
+        parts = placeholder.split(source)
+        # Literal parts are between the names of the parameters
+        self.literals = parts[0::2]
+        self.names = parts[1::2]
+        self.digest = hashlib.sha256(source.encode()).hexdigest()
+
+    def render(self, parameters: dict) -> str:
+        """
+        Fill the placeholders with the parameters.
+
+        Parameters:
+            parameters (dict): Parameters of the template. Values are inserted as str(value).
+
+        Returns:
+            str: Rendered text.
+        """
+        missing = set(self.names) - parameters.keys()
+        if missing:
+            raise ValueError(f"Missing template parameters {sorted(missing)}")
+
+        parts = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:]):
+            parts.append(str(parameters[name]))
+            parts.append(literal)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=16)
+def compile_template(path: str, modified: int) -> PageTemplate:
+    """
+    Read and parse the template file (once for each modification time).
+
+    Parameters:
+        path (str): Resolved path to the template file.
+        modified (int): Modification time of the file in nanoseconds.
+
+    Returns:
+        PageTemplate: The parsed template.
+    """
+    return PageTemplate(Path(path).read_text())
+
+
+def load_template(path: str) -> PageTemplate:
+    """
+    Get the parsed template file. Templates are parsed once per process
+    and parsed again only when the file changes.
+
+    Parameters:
+        path (str): Path to the template file.
+
+    Returns:
+        PageTemplate: The parsed template.
+    """
+    path = Path(path).resolve()
+    return compile_template(str(path), path.stat().st_mtime_ns)
@@ -0,0 +1,54 @@
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+# Browser and Plotly stubs, enough to run the scripts of the page in node
+NODE_PRELUDE = """
+global.atob = (s) => Buffer.from(s, 'base64').toString('binary');
+global.window = global;
+global.document = {getElementById: () => ({on: () => {}})};
+global.requestAnimationFrame = () => 0;
+global.performance = {now: () => 0};
+global.plotly_calls = [];
+global.Plotly = {
+    newPlot: (id, traces, layout) => {
+        plotly_calls.push({traces: traces, layout: layout});
+        return Promise.resolve({on: () => {}, layout: layout});
+    },
+    restyle: () => {}, extendTraces: () => {}, relayout: () => {},
+};
+"""
+
+
+@pytest.fixture
+def run_page():
+    """
+    Run the scripts of an HTML page in node and evaluate a JavaScript expression in its global scope.
+    Tests using it are skipped when node is not installed.
+    """
+    node = shutil.which("node")
+    if node is None:
+        pytest.skip("node is not installed")
+
+    def run(html: str, expression: str):
+        scripts = re.findall(r"<script>([\s\S]*?)</script>", html)
+        program = (
+            NODE_PRELUDE
+            + f"for (const script of {json.dumps(scripts)}) (0, eval)(script);\n"
+            # Typed arrays are serialized as lists
+            + f"console.log(JSON.stringify((0, eval)({json.dumps(expression)}),"
+            + " (key, value) => ArrayBuffer.isView(value) ? Array.from(value) : value));"
+        )
+        result = subprocess.run(
+            [node, "-"],
+            input=program,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(result.stdout)
+
+    return run
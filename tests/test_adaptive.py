@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from src.motions import CircleMotion
+from src.shapes import Circle, Elipse
+
+
+def max_deviation(motion: CircleMotion, samples: int = 32) -> float:
+    """Largest distance (in pixels) of the curve from the chords of the adaptive polyline."""
+    thetas = motion.calculate_adaptive_thetas()
+    fractions = np.linspace(0, 1, samples + 1)[1:-1]
+    between = thetas[:-1, None] + np.diff(thetas)[:, None] * fractions
+    x, y, _, _ = motion.calculate_trajectory(
+        between, motion.distance_to_border
+    )
+    ends_x, ends_y, _, _ = motion.calculate_trajectory(
+        thetas, motion.distance_to_border
+    )
+    start_x, start_y = ends_x[:-1, None], ends_y[:-1, None]
+    chord_x, chord_y = np.diff(ends_x)[:, None], np.diff(ends_y)[:, None]
+    length = np.maximum(chord_x**2 + chord_y**2, 1e-24)
+    along = np.clip(
+        ((x - start_x) * chord_x + (y - start_y) * chord_y) / length, 0, 1
+    )
+    distance = np.hypot(
+        x - start_x - along * chord_x, y - start_y - along * chord_y
+    )
+    return distance.max() * motion.tolerance / motion.plot_tolerance
+
+
+@pytest.mark.parametrize(
+    "orbit, radius, distance",
+    [
+        (Circle(96, 0), 23, 3),
+        (Elipse(96, 60, 0), 23, 3),
+        # Orbits more curved than the circle near their vertices (cusps of the center path)
+        (Elipse(48, 30, 0), 20, 0),
+        (Elipse(48, 30, 0), 29, 10),
+        (Elipse(80, 30, 0), 10.3, 5),
+    ],
+)
+def test_adaptive_thetas_within_tolerance(orbit, radius, distance):
+    motion = CircleMotion(
+        orbit, Circle(radius, 0), distance, False, 50000, tolerance=0.5
+    )
+    assert len(motion.calculate_adaptive_thetas()) < motion.quality
+    # The middle of a chord may miss the peak of an asymmetric bump by a bit
+    assert max_deviation(motion) <= 0.55
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import numpy as np
+
+from src.controllers import DrawController
+from src.motions import CircleMotion
+from src.shapes import Circle
+
+TEMPLATE = str(
+    Path(__file__).parent.parent / "src" / "html_views" / "plots.html"
+)
+
+# Runs the animation to its end with frames 50 ms apart, recording the calls of Plotly
+ANIMATION = """(() => {
+    var frames = [], calls = [];
+    requestAnimationFrame = (callback) => frames.push(callback);
+    Plotly.extendTraces = (id, update, indices, max_points) =>
+        calls.push({update: update, indices: indices, max_points: max_points});
+    Plotly.restyle = (id, update, indices) => calls.push({restyle: indices});
+    init_plot(movements_x, movements_y);
+    for (var now = 0; frames.length; now += 50) {
+        frames.shift()(now);
+    }
+    return calls;
+})()"""
+
+
+def test_frames_append_new_points_only(run_page):
+    orbit = Circle(96, 0x1F77B4)
+    motions = [
+        CircleMotion(orbit, Circle(23, 0), 7, False, 300),
+        CircleMotion(orbit, Circle(31, 0), 2, True, 200),
+    ]
+    controller = DrawController(orbit, motions, 1000, False, True, TEMPLATE)
+
+    calls = run_page(controller.submit_parameters(), ANIMATION)
+
+    assert all("restyle" not in call for call in calls)
+    # One point in the first frame and speed * 0.05 points in every next one
+    assert len(calls) == 1 + np.ceil((300 - 1) / 50)
+    for j, motion in enumerate(motions):
+        xs = np.concatenate([call["update"]["x"][j] for call in calls])
+        ys = np.concatenate([call["update"]["y"][j] for call in calls])
+        np.testing.assert_allclose(xs, motion.x, atol=1e-6)
+        np.testing.assert_allclose(ys, motion.y, atol=1e-6)
+    for call in calls:
+        assert call["indices"] == [0, 1, 2, 3]
+        # Circles are replaced by their outline in the frame, and removed at the end
+        outlines = [len(xs) for xs in call["update"]["x"][2:]]
+        assert call["max_points"]["x"][2:] == outlines
+    assert outlines == [0, 0]
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.batch import SpirographBatch
+from src.controllers import DrawController
+from src.decimation import PixelGridDecimator
+from src.epicycles import EpicycleMotion
+from src.motions import CircleMotion
+from src.shapes import Circle, Elipse
+
+TEMPLATE = str(
+    Path(__file__).parent.parent / "src" / "html_views" / "plots.html"
+)
+
+
+def test_batch_matches_motions():
+    orbit = Elipse(96, 60, 0)
+    motions = [
+        CircleMotion(orbit, Circle(radius, 0), 5, outer, quality=3000)
+        for radius, outer in [(17, False), (23, True), (31, False)]
+    ]
+    SpirographBatch(orbit, motions).compute()
+
+    for m in motions:
+        expected = CircleMotion(
+            orbit, m.circle, m.distance_to_border, m.direction == 1, 3000
+        )
+        for array, expected_array in zip(m.trajectory, expected.trajectory):
+            np.testing.assert_allclose(array, expected_array, atol=1e-9)
+
+
+def test_batched_trajectories_do_not_keep_batch_alive():
+    orbit = Circle(96, 0)
+    motions = [
+        CircleMotion(orbit, Circle(radius, 0), 5, False, tolerance=0.5)
+        for radius in (12, 37, 41)
+    ]
+    batch = SpirographBatch(orbit, motions)
+    batch.compute()
+
+    for m in motions:
+        assert all(array.base is None for array in m.trajectory)
+        assert m.nbytes == sum(array.nbytes for array in m.trajectory)
+
+
+@pytest.mark.parametrize("encoding", ["text", "float32", "int16"])
+def test_page_decodes_stacked_movements(encoding, run_page):
+    orbit = Circle(96, 0)
+    motions = [
+        CircleMotion(orbit, Circle(17, 0), 5, False, quality=3000),
+        CircleMotion(orbit, Circle(23, 0), 3, True, tolerance=0.5),
+        EpicycleMotion(
+            orbit, [Circle(40, None), Circle(13, 0)], [False, True], 4
+        ),
+    ]
+    controller = DrawController(
+        orbit, motions, 200, False, True, TEMPLATE, encoding, resolution=500
+    )
+
+    movements_x, movements_y, frames = run_page(
+        controller.submit_parameters(),
+        "[movements_x, movements_y, circles_frames]",
+    )
+
+    # Decimated one by one, like the stacked movements in one pass
+    decimator = PixelGridDecimator(*controller.get_ranges(), 500)
+    atol = controller.get_encoder().scale if encoding == "int16" else 1e-4
+    for i, m in enumerate(motions):
+        kept = decimator.reduce(m.x, m.y)
+        np.testing.assert_allclose(movements_x[i], m.x[kept], atol=atol)
+        np.testing.assert_allclose(movements_y[i], m.y[kept], atol=atol)
+        expected = m.calculate_circle_frames(
+            m.x[kept], m.y[kept], m.x_center[kept], m.y_center[kept]
+        )
+        np.testing.assert_allclose(frames[i], expected, atol=atol)
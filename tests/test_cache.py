@@ -0,0 +1,27 @@
+import numpy as np
+
+from src.cache import RenderCache
+from src.motions import CircleMotion
+from src.shapes import Circle
+
+
+def test_refresh_while_stages_are_computed():
+    motion = CircleMotion(Circle(96, 0), Circle(23, 0), 7, False)
+
+    class ConcurrentStage(np.ndarray):
+        """Array whose measuring lets another session compute a stage of the motion."""
+
+        @property
+        def nbytes(self):
+            motion.circle_frames
+            return super().nbytes
+
+    x, y, x_center, y_center = motion.trajectory
+    motion.set_stage(
+        "trajectory", (x.view(ConcurrentStage), y, x_center, y_center)
+    )
+    cache = RenderCache(2**30, sizeof=lambda m: m.nbytes)
+    cache.put("motion", motion)
+
+    cache.refresh()
+    assert cache.stats()["bytes"] == motion.nbytes
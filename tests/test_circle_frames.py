@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.controllers import DrawController
+from src.motions import CircleMotion
+from src.shapes import Circle, Elipse
+
+TEMPLATE = str(
+    Path(__file__).parent.parent / "src" / "html_views" / "plots.html"
+)
+
+ORBITS = [Circle(96, 0x1F77B4), Elipse(96, 60, 0x1F77B4)]
+
+
+def outline_from_frames(
+    frames: np.ndarray, radius: float, n_points: int = 10
+) -> tuple[np.ndarray, np.ndarray]:
+    """Outline of the circle rebuilt from its frames like circle_outline in plots.html."""
+    thetas = frames[:, 2:3] + np.linspace(0, 2 * np.pi, n_points)
+    return (
+        frames[:, 0:1] + radius * np.cos(thetas),
+        frames[:, 1:2] + radius * np.sin(thetas),
+    )
+
+
+def baseline_circle_movement(
+    motion: CircleMotion, n_points: int = 10
+) -> tuple[np.ndarray, np.ndarray]:
+    """Outlines of the circle calculated sample by sample like the original calculate_circle_movement."""
+    radius = motion.circle.radius - motion.distance_to_border
+    xs, ys = [], []
+    for x, y, x_center, y_center in zip(
+        motion.x, motion.y, motion.x_center, motion.y_center
+    ):
+        start_angle = np.arctan2(y - y_center, x - x_center)
+        thetas = np.linspace(start_angle, start_angle + 2 * np.pi, n_points)
+        xs.append(radius * np.cos(thetas) + x_center)
+        ys.append(radius * np.sin(thetas) + y_center)
+    return np.array(xs), np.array(ys)
+
+
+@pytest.mark.parametrize("orbit", ORBITS)
+@pytest.mark.parametrize("outer", [False, True])
+def test_frames_match_baseline_loop(orbit, outer):
+    motion = CircleMotion(orbit, Circle(23, 0), 7, outer, quality=2000)
+
+    expected_x, expected_y = baseline_circle_movement(motion)
+    frames = motion.calculate_circle_frames(
+        motion.x, motion.y, motion.x_center, motion.y_center
+    )
+    x, y = outline_from_frames(
+        frames, motion.circle.radius - motion.distance_to_border
+    )
+
+    np.testing.assert_allclose(x, expected_x, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(y, expected_y, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("orbit", ORBITS)
+def test_page_outline_matches_circle_position(orbit, run_page):
+    motions = [
+        CircleMotion(orbit, Circle(23, 0xFF7F0E), 7, False, quality=500),
+        CircleMotion(orbit, Circle(31, 0x2CA02C), 0, True, quality=500),
+    ]
+    controller = DrawController(
+        orbit, motions, 200, False, True, TEMPLATE, encoding="text"
+    )
+    frames = [0, 123, 499]
+    outlines = run_page(
+        controller.submit_parameters(),
+        f"[0, 1].map(j => {frames}.map(frame => circle_outline(j, frame)))",
+    )
+
+    for motion, outline in zip(motions, outlines):
+        expected_x, expected_y = motion.calculate_circle_position(
+            motion.x[frames],
+            motion.y[frames],
+            motion.x_center[frames],
+            motion.y_center[frames],
+        )
+        x, y = np.array(outline).transpose(1, 0, 2)
+        np.testing.assert_allclose(x, expected_x, rtol=0, atol=1e-9)
+        np.testing.assert_allclose(y, expected_y, rtol=0, atol=1e-9)
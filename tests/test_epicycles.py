@@ -0,0 +1,97 @@
+from fractions import Fraction
+
+import numpy as np
+
+from src.epicycles import EpicycleMotion
+from src.motions import CircleMotion
+from src.shapes import Circle
+
+
+def test_chain_of_one_circle_is_circle_motion():
+    orbit = Circle(96, 0)
+    chain = EpicycleMotion(orbit, [Circle(36, 0)], [False], 5, quality=4000)
+    motion = CircleMotion(orbit, Circle(36, 0), 5, False, quality=4000)
+
+    assert chain.rotations == motion.rotations
+    np.testing.assert_allclose(chain.x, motion.x, atol=1e-9)
+    np.testing.assert_allclose(chain.y, motion.y, atol=1e-9)
+
+
+def test_rotations_of_non_integer_period():
+    motion = EpicycleMotion(
+        Circle(96, 0), [Circle(40, None), Circle(13, 0)], [False, True], 4
+    )
+    # Without the first phasor (zero amplitude) the speeds 3/2 and 3 have the period 2/3,
+    # so the smallest integer number of rotations closing the drawing is 2
+    motion.stage_speeds = lambda radius=float: (
+        [radius(0), radius(5), radius(3)],
+        [radius(1), Fraction(3, 2), radius(3)],
+    )
+
+    assert motion.calculate_number_of_rotations() == 2
+
+
+def test_uniform_trajectory_closes_drawing():
+    motion = EpicycleMotion(
+        Circle(96, 0),
+        [Circle(40, None), Circle(13, 0)],
+        [False, True],
+        4,
+        quality=3000,
+    )
+    trajectory = motion.calculate_uniform_trajectory()
+
+    assert trajectory is not None
+    x, y = motion.calculate_trajectory(
+        motion.calculate_thetas(), motion.distance_to_border
+    )[:2]
+    np.testing.assert_allclose(trajectory[0], x, atol=1e-9)
+    np.testing.assert_allclose(trajectory[1], y, atol=1e-9)
+
+
+def test_uniform_trajectory_with_phases():
+    motion = EpicycleMotion(
+        Circle(96, 0),
+        [Circle(40, None), Circle(13, 0)],
+        [False, True],
+        4,
+        quality=3000,
+        phases=[0.3, -1.2, 2.5],
+    )
+    trajectory = motion.calculate_uniform_trajectory()
+
+    assert trajectory is not None
+    expected = motion.calculate_trajectory(
+        motion.calculate_thetas(), motion.distance_to_border
+    )
+    for array, expected_array in zip(trajectory, expected):
+        np.testing.assert_allclose(array, expected_array, atol=1e-9)
+    # The pen starts at the sum of the phasors rotated by their phases
+    amplitudes, _ = motion.phasors
+    start = np.sum(amplitudes * np.exp(1j * np.array(motion.phases)))
+    np.testing.assert_allclose(
+        [trajectory[0][0], trajectory[1][0]],
+        [start.real, start.imag],
+        atol=1e-9,
+    )
+
+
+def test_equal_phases_rotate_drawing():
+    orbit = Circle(96, 0)
+    phase = 0.7
+    motion = EpicycleMotion(orbit, [Circle(36, 0)], [False], 5, quality=4000)
+    rotated = EpicycleMotion(
+        orbit, [Circle(36, 0)], [False], 5, quality=4000, phases=[phase] * 2
+    )
+    t = np.linspace(0, 2 * np.pi, 50)
+
+    for calculate in ("calculate_trajectory", "calculate_derivatives"):
+        x, y = getattr(motion, calculate)(t, 5)[:2]
+        x_rotated, y_rotated = getattr(rotated, calculate)(t, 5)[:2]
+        expected = (x + 1j * y) * np.exp(1j * phase)
+        np.testing.assert_allclose(x_rotated, expected.real, atol=1e-9)
+        np.testing.assert_allclose(y_rotated, expected.imag, atol=1e-9)
+    expected = (motion.x + 1j * motion.y) * np.exp(1j * phase)
+    np.testing.assert_allclose(rotated.x, expected.real, atol=1e-9)
+    np.testing.assert_allclose(rotated.y, expected.imag, atol=1e-9)
+    assert rotated.key() != motion.key()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.const_params import viewport_size
+from src.epicycles import EpicycleMotion
+from src.motions import CircleMotion
+from src.shapes import Circle, Elipse, SampledPathShape
+
+
+def star(size: float = 96, quality: int = 2000) -> np.ndarray:
+    """Points of a smooth star outline."""
+    thetas = np.linspace(0, 2 * np.pi, quality, endpoint=False)
+    r = size * (1 + 0.15 * np.cos(5 * thetas))
+    return np.column_stack((r * np.cos(thetas), r * np.sin(thetas)))
+
+
+def create_motion(name: str, dtype: np.dtype) -> CircleMotion:
+    """Motion of the checked drawing calculated as dtype."""
+    if name == "epicycle":
+        orbit = Circle(96, 0)
+        return EpicycleMotion(
+            orbit,
+            [Circle(40, None), Circle(13, 0)],
+            [False, True],
+            4,
+            quality=20000,
+            dtype=dtype,
+        )
+    orbit = {
+        "circle": Circle(96, 0),
+        "elipse": Elipse(96, 60, 0),
+        "path": SampledPathShape(star(), 0),
+    }[name]
+    # 37 and 96 are coprime, so the drawing needs many rotations (large phases)
+    return CircleMotion(orbit, Circle(37, 0), 9, False, 20000, dtype=dtype)
+
+
+@pytest.mark.parametrize("name", ["circle", "elipse", "path", "epicycle"])
+def test_float32_error_is_below_pixel(name):
+    exact = create_motion(name, np.float64)
+    motion = create_motion(name, np.float32)
+
+    assert motion.x.dtype == np.float32
+    assert motion.rotations == exact.rotations
+    # Error in pixels of a viewport_size plot of the drawing
+    pixel = 2 * max(exact.x_range, exact.y_range) / viewport_size
+    error = max(
+        np.abs(motion.x - exact.x).max(), np.abs(motion.y - exact.y).max()
+    )
+    assert error / pixel < 1e-3
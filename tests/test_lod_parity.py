@@ -0,0 +1,209 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.const_params import max_lod_level
+from src.controllers import DrawController
+from src.motions import CircleMotion
+from src.shapes import Circle, Elipse
+
+TEMPLATE = str(
+    Path(__file__).parent.parent / "src" / "html_views" / "plots.html"
+)
+
+
+class TrajectoryPyramid:
+    """
+    Reference of the level-of-detail pyramid evaluated by the HTML view on zoom
+    (parametric render mode, see lod_level and lod_points in plots.html).
+
+    Level 0 is the trajectory of the motion (CircleMotion.trajectory), which is drawn in the full view.
+    Level k places 2^k points on every segment of level 0 (between its consecutive time parameters),
+    but only the segments which can be visible in the view are evaluated. Zooming k times shows about
+    1/k of the drawing, so the number of calculated points follows what is on screen and stays close
+    to the size of the full view.
+    """
+
+    def __init__(
+        self,
+        motion: CircleMotion,
+        x_range: list[float] | None = None,
+        y_range: list[float] | None = None,
+        max_level: int = max_lod_level,
+    ):
+        """
+        Initialize TrajectoryPyramid object.
+
+        Parameters:
+            motion (CircleMotion): The motion.
+            x_range (list[float], optional): x range of the full view. Default is the range of the motion.
+            y_range (list[float], optional): y range of the full view. Default is the range of the motion.
+            max_level (int, optional): Maximum level of detail. Default is max_lod_level.
+        """
+        self.motion = motion
+        self.x_range = x_range or [-motion.x_range, motion.x_range]
+        self.y_range = y_range or [-motion.y_range, motion.y_range]
+        self.max_level = max_level
+        self.thetas = motion.calculate_thetas()
+        _, _, ddx, ddy = motion.calculate_derivatives(
+            self.thetas, motion.distance_to_border
+        )
+        self.acceleration = np.hypot(ddx, ddy)
+
+    def select_level(self, x_view: list[float], y_view: list[float]) -> int:
+        """
+        Select level of detail of the view, so points are as dense on screen as in the full view.
+
+        Parameters:
+            x_view (list[float]): x range of the view.
+            y_view (list[float]): y range of the view.
+
+        Returns:
+            int: Level of detail (from 0 to max_level).
+        """
+        zoom = max(
+            (self.x_range[1] - self.x_range[0]) / (x_view[1] - x_view[0]),
+            (self.y_range[1] - self.y_range[0]) / (y_view[1] - y_view[0]),
+        )
+        level = np.ceil(np.log2(max(zoom, 1)))
+        return int(min(level, self.max_level))
+
+    def visible_segments(
+        self, x_view: list[float], y_view: list[float]
+    ) -> np.ndarray:
+        """
+        Find segments of level 0 which can be visible in the view.
+
+        The curve deviates from a segment spanning dt by at most |r''| * dt^2 / 8
+        (see CircleMotion.calculate_adaptive_thetas), so bounding boxes of the segments are extended
+        by twice this bound with |r''| taken as the larger one at the ends of the segment.
+
+        Parameters:
+            x_view (list[float]): x range of the view.
+            y_view (list[float]): y range of the view.
+
+        Returns:
+            np.ndarray: Indices of the first points of the visible segments (in increasing order).
+        """
+        x, y = self.motion.x, self.motion.y
+        margin = (
+            np.maximum(self.acceleration[:-1], self.acceleration[1:])
+            * np.diff(self.thetas) ** 2
+            / 4
+        )
+        x_low = np.minimum(x[:-1], x[1:]) - margin
+        x_high = np.maximum(x[:-1], x[1:]) + margin
+        y_low = np.minimum(y[:-1], y[1:]) - margin
+        y_high = np.maximum(y[:-1], y[1:]) + margin
+        return np.flatnonzero(
+            (x_low <= x_view[1])
+            & (x_high >= x_view[0])
+            & (y_low <= y_view[1])
+            & (y_high >= y_view[0])
+        )
+
+    def level(
+        self, level: int, x_view: list[float], y_view: list[float]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate points of the level of detail on the visible segments.
+
+        Parameters:
+            level (int): Level of detail.
+            x_view (list[float]): x range of the view.
+            y_view (list[float]): y range of the view.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Tuple containing x and y coordinates of the pen.
+            Separate runs of visible segments are divided by NaN, so they are not connected in the plot.
+        """
+        segments = self.visible_segments(x_view, y_view)
+        if not len(segments):
+            return np.empty(0), np.empty(0)
+
+        n = 2**level
+        x, y = self.motion.x, self.motion.y
+        xs = np.full((len(segments), n + 2), np.nan)
+        ys = np.full((len(segments), n + 2), np.nan)
+        xs[:, 0], ys[:, 0] = x[segments], y[segments]
+        xs[:, n], ys[:, n] = x[segments + 1], y[segments + 1]
+        if n > 1:
+            starts = self.thetas[segments]
+            widths = self.thetas[segments + 1] - starts
+            thetas = starts[:, None] + widths[:, None] * (np.arange(1, n) / n)
+            xs[:, 1:n], ys[:, 1:n], _, _ = self.motion.calculate_trajectory(
+                thetas, self.motion.distance_to_border
+            )
+
+        # The end of a segment is the start of the next one, so it is kept (with the NaN after it)
+        # only at the end of a run of visible segments
+        run_ends = np.append(segments[1:] != segments[:-1] + 1, True)
+        keep = np.ones(xs.shape, dtype=bool)
+        keep[:, n] = run_ends
+        keep[:, n + 1] = run_ends
+        keep[-1, n + 1] = False
+        return xs[keep], ys[keep]
+
+    def view(
+        self, x_view: list[float], y_view: list[float]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate points of the drawing in the view with the selected level of detail.
+
+        Parameters:
+            x_view (list[float]): x range of the view.
+            y_view (list[float]): y range of the view.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Tuple containing x and y coordinates of the pen (see level).
+        """
+        return self.level(self.select_level(x_view, y_view), x_view, y_view)
+
+
+def zoomed_views(motions: list[CircleMotion]) -> list[list[list[float]]]:
+    """Views (x range, y range) from the full view to deep zooms into points of the drawings."""
+    views = [[[-150, 150], [-150, 150]], [[20, 80], [-10, 50]]]
+    for motion, width in zip(motions, (1, 0.02)):
+        x, y = float(motion.x[100]), float(motion.y[100])
+        views.append([[x - width, x + width], [y - width, y + width]])
+    return views
+
+
+@pytest.mark.parametrize("orbit", [Circle(96, 0), Elipse(96, 60, 0)])
+@pytest.mark.parametrize("tolerance", [None, 0.5])
+def test_page_lod_matches_pyramid(orbit, tolerance, run_page):
+    motions = [
+        CircleMotion(orbit, Circle(23, 0), 7, False, 3000, tolerance),
+        CircleMotion(orbit, Circle(31, 0), 2, True, 3000, tolerance),
+    ]
+    controller = DrawController(
+        orbit,
+        motions,
+        200,
+        False,
+        False,
+        TEMPLATE,
+        encoding="text",
+        render_mode="parametric",
+    )
+    x_range, y_range = controller.get_ranges()
+    views = zoomed_views(motions)
+    results = run_page(
+        controller.submit_parameters(),
+        f"{views}.map(view => [lod_level(view[0], view[1]),"
+        " trajectories.map((t, j) => lod_points(j, view[0], view[1]))])",
+    )
+
+    for (x_view, y_view), (level, points) in zip(views, results):
+        # Every view shows a part of some drawing
+        assert any(len(xs) for xs, _ in points)
+        for motion, (xs, ys) in zip(motions, points):
+            pyramid = TrajectoryPyramid(motion, x_range, y_range)
+            assert pyramid.select_level(x_view, y_view) == level
+            expected_x, expected_y = pyramid.view(x_view, y_view)
+            # Breaks between runs of segments are null in the page and NaN in the pyramid
+            xs = np.array(xs, dtype=float)
+            ys = np.array(ys, dtype=float)
+            np.testing.assert_allclose(xs, expected_x, rtol=0, atol=1e-9)
+            np.testing.assert_allclose(ys, expected_y, rtol=0, atol=1e-9)
@@ -0,0 +1,23 @@
+import json
+import logging
+
+from src.metrics import Instrumentation, logger
+
+
+def test_render_writes_json_line(capsys):
+    handlers = list(logger.handlers)
+    logger.handlers.clear()
+    try:
+        instrumentation = Instrumentation(enabled=True)
+        with instrumentation.render("show_drawing"):
+            with instrumentation.span("stage") as span:
+                span.bytes = 42
+        line = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+    finally:
+        logger.handlers[:] = handlers
+        logger.setLevel(logging.NOTSET)
+        logger.propagate = True
+
+    assert line["event"] == "show_drawing"
+    assert line["bytes"] == 42
+    assert [span["name"] for span in line["spans"]] == ["stage"]
@@ -0,0 +1,115 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.controllers import DrawController
+from src.epicycles import EpicycleMotion
+from src.motions import CircleMotion
+from src.shapes import Circle, Elipse, SampledPathShape
+
+TEMPLATE = str(
+    Path(__file__).parent.parent / "src" / "html_views" / "plots.html"
+)
+
+
+def star(size: float = 96, quality: int = 2000) -> np.ndarray:
+    """Points of a smooth star outline."""
+    thetas = np.linspace(0, 2 * np.pi, quality, endpoint=False)
+    r = size * (1 + 0.15 * np.cos(5 * thetas))
+    return np.column_stack((r * np.cos(thetas), r * np.sin(thetas)))
+
+
+def drawings() -> dict:
+    """Orbits and motions of the checked drawings."""
+    circle = Circle(96, 0x1F77B4)
+    elipse = Elipse(96, 60, 0x1F77B4)
+    path = SampledPathShape(star(), 0x1F77B4)
+    return {
+        "circle": (
+            circle,
+            [
+                CircleMotion(circle, Circle(23, 0), 7, False, 3000),
+                CircleMotion(circle, Circle(31, 0), 0, True, 3000),
+            ],
+        ),
+        "elipse": (
+            elipse,
+            [CircleMotion(elipse, Circle(17, 0), 5, False, 3000)],
+        ),
+        "adaptive": (
+            elipse,
+            [
+                CircleMotion(
+                    elipse, Circle(17, 0), 5, True, 20000, tolerance=0.5
+                )
+            ],
+        ),
+        "cusps": (
+            Elipse(48, 30, 0x1F77B4),
+            [
+                CircleMotion(
+                    Elipse(48, 30, 0x1F77B4),
+                    Circle(29, 0),
+                    10,
+                    False,
+                    20000,
+                    tolerance=0.5,
+                )
+            ],
+        ),
+        "epicycle": (
+            circle,
+            [
+                EpicycleMotion(
+                    circle,
+                    [Circle(40, None), Circle(13, 0)],
+                    [False, True],
+                    4,
+                    quality=3000,
+                )
+            ],
+        ),
+        "epicycle phases": (
+            circle,
+            [
+                EpicycleMotion(
+                    circle,
+                    [Circle(40, None), Circle(13, 0)],
+                    [False, True],
+                    4,
+                    quality=3000,
+                    phases=[0.3, -1.2, 2.5],
+                )
+            ],
+        ),
+        "path": (
+            path,
+            [CircleMotion(path, Circle(11, 0), 3, False, 3000)],
+        ),
+    }
+
+
+@pytest.mark.parametrize("name", list(drawings()))
+def test_page_trajectories_match_python(name, run_page):
+    orbit, motions = drawings()[name]
+    controller = DrawController(
+        orbit,
+        motions,
+        200,
+        False,
+        False,
+        TEMPLATE,
+        encoding="text",
+        render_mode="parametric",
+    )
+    trajectories = run_page(
+        controller.submit_parameters(),
+        "trajectories.map(t => [t.x, t.y, t.x_center, t.y_center])",
+    )
+
+    assert len(trajectories) == len(motions)
+    for motion, trajectory in zip(motions, trajectories):
+        for array, expected in zip(trajectory, motion.trajectory):
+            assert len(array) == len(expected)
+            np.testing.assert_allclose(array, expected, rtol=0, atol=1e-9)
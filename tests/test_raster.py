@@ -0,0 +1,88 @@
+import struct
+import zlib
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.controllers import DrawController
+from src.raster import Rasterizer
+from src.shapes import Circle
+from src.svg_export import SvgExporter
+
+TEMPLATE = str(
+    Path(__file__).parent.parent / "src" / "html_views" / "plots.html"
+)
+
+
+def test_raster_mode_without_circles():
+    controller = DrawController(
+        Circle(96, 0), [], 200, True, False, TEMPLATE, render_mode="raster"
+    )
+    assert controller.prepare_parameters()["static_image"] == '""'
+    assert "<html" in controller.submit_parameters()
+    SvgExporter(controller).write(StringIO())
+
+
+def test_rasterizer_rejects_empty_range():
+    with pytest.raises(ValueError):
+        Rasterizer([0, 0], [0, 0], 100)
+
+
+def decode_png(png: bytes) -> tuple[np.ndarray, set[int]]:
+    """RGBA array of a PNG written by Rasterizer and the filter types of its rows."""
+    width, height = struct.unpack(">II", png[16:24])
+    position, data = 8, b""
+    while position < len(png):
+        (length,) = struct.unpack(">I", png[position : position + 4])
+        if png[position + 4 : position + 8] == b"IDAT":
+            data += png[position + 8 : position + 8 + length]
+        position += length + 12
+    rows = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+    rows = rows.reshape(height, width * 4 + 1)
+    filters, pixels = rows[:, 0], rows[:, 1:].reshape(height, width, 4)
+    # Filters are applied modulo 256, so prefix sums in uint8 undo them
+    if (filters == 1).all():
+        pixels = np.cumsum(pixels, axis=1, dtype=np.uint8)
+    if (filters == 2).all():
+        pixels = np.cumsum(pixels, axis=0, dtype=np.uint8)
+    return pixels, set(filters.tolist())
+
+
+@pytest.mark.parametrize(
+    "image, filter_type",
+    [
+        ("drawing", 0),
+        ("horizontal gradient", 1),
+        ("vertical gradient", 2),
+    ],
+)
+def test_png_round_trip(image, filter_type):
+    rasterizer = Rasterizer([-100, 100], [-60, 60], 200)
+    if image == "drawing":
+        t = np.linspace(0, 14 * np.pi, 5000)
+        rasterizer.draw_polyline(
+            90 * np.cos(t) + 20 * np.cos(9 * t),
+            50 * np.sin(t) + 20 * np.sin(9 * t),
+            0x1F77B4,
+        )
+    else:
+        # Gradients with a random slope in each row (or column)
+        slopes = np.random.default_rng(0).uniform(0.2, 1, 200)
+        ramp = np.outer(
+            slopes[: rasterizer.height],
+            np.linspace(0, 1, rasterizer.width),
+        )
+        if image == "vertical gradient":
+            ramp = np.outer(
+                np.linspace(0, 1, rasterizer.height),
+                slopes[: rasterizer.width],
+            )
+        rasterizer.alpha[:] = 1
+        rasterizer.rgb[:] = ramp[..., None] * [1, 0.5, 0.25]
+
+    pixels, filters = decode_png(rasterizer.to_png())
+
+    np.testing.assert_array_equal(pixels, rasterizer.to_rgba())
+    assert filters == {filter_type}
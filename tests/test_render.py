@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+RENDER = str(Path(__file__).parent.parent / "render.py")
+
+
+def test_failed_specs_do_not_stop_the_batch(tmp_path):
+    specs = [
+        {
+            "name": "rose",
+            "orbit": {"shape": "circle", "radius": 96},
+            "circles": [{"radius": 24, "pen_distance": 20}],
+        },
+        {"name": "hexagon", "orbit": {"shape": "hexagon"}, "circles": []},
+        {
+            "name": "daisy",
+            "orbit": {"shape": "elipse", "width": 192, "height": 120},
+            "circles": [{"radius": 30, "outer": True}],
+        },
+    ]
+    (tmp_path / "specs.jsonl").write_text(
+        "\n".join(json.dumps(spec) for spec in specs)
+    )
+
+    result = subprocess.run(
+        [sys.executable, RENDER, "specs.jsonl", "--output", "renders"]
+        + ["--formats", "html", "svg", "--workers", "2"],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 1
+    assert (
+        "hexagon: ValueError: Unknown orbit shape 'hexagon'" in result.stdout
+    )
+    for name in ("rose", "daisy"):
+        assert (tmp_path / "renders" / f"{name}.html").exists()
+        assert (tmp_path / "renders" / f"{name}.svg").exists()
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from src.shapes import Circle, Elipse, SampledPathShape
+
+
+def ellipse_points(a: float, b: float, quality: int = 4000) -> np.ndarray:
+    """Points of an ellipse outline."""
+    thetas = np.linspace(0, 2 * np.pi, quality, endpoint=False)
+    return np.column_stack((a * np.cos(thetas), b * np.sin(thetas)))
+
+
+@pytest.mark.parametrize("distance", [-20, 0, 15])
+def test_sampled_ellipse_matches_elipse(distance):
+    path = SampledPathShape(ellipse_points(96, 60), 0, samples=4096)
+    elipse = Elipse(96, 60, 0)
+
+    assert path.circumference(distance) == pytest.approx(
+        elipse.circumference(distance), rel=1e-4
+    )
+
+
+def test_sampled_circle_matches_circle():
+    path = SampledPathShape(ellipse_points(96, 96), 0, samples=4096)
+    circle = Circle(96, 0)
+    t = np.linspace(0, 2 * np.pi, 50)
+
+    x, y = path.parametric_equation(t, 1, 10)
+    expected_x, expected_y = circle.parametric_equation(t, 1, 10)
+    np.testing.assert_allclose(
+        np.hypot(x, y), np.hypot(expected_x, expected_y), rtol=1e-3
+    )
+
+
+@pytest.mark.parametrize(
+    "points",
+    [
+        [],
+        [[0, 0], [1, 1]],
+        [1, 2, 3, 4],
+        [[0, 0, 0], [1, 1, 1], [2, 0, 1]],
+        [[0, 0], [1, np.nan], [2, 0]],
+        [[0, 0], [1, 1], [2, 2], [3, 3]],
+    ],
+)
+def test_invalid_outline(points):
+    with pytest.raises(ValueError):
+        SampledPathShape(np.array(points, dtype=float), 0)
@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+
+from src.cache import RenderCache
+from src.controllers import DrawController
+from src.motions import CircleMotion
+from src.shapes import Circle, Elipse
+
+TEMPLATE = str(
+    Path(__file__).parent.parent / "src" / "html_views" / "plots.html"
+)
+
+
+def motions() -> list[CircleMotion]:
+    """Motions on a shared orbit, one of them adaptively sampled."""
+    orbit = Elipse(96, 60, 0x1F77B4)
+    return [
+        CircleMotion(orbit, Circle(23, 0xFF7F0E), 7, False, quality=2000),
+        CircleMotion(orbit, Circle(31, 0x2CA02C), 0, True, quality=2000),
+        CircleMotion(
+            orbit, Circle(17, 0xD62728), 3, False, quality=2000, tolerance=0.5
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "render_mode, animate, resolution",
+    [
+        ("vector", False, 500),
+        ("vector", True, None),
+        ("raster", False, 500),
+        ("parametric", False, None),
+        ("stream", False, 500),
+    ],
+)
+def test_stages_run_once_per_submit(render_mode, animate, resolution):
+    drawing = motions()
+    controller = DrawController(
+        drawing[0].orbit,
+        drawing,
+        200,
+        True,
+        animate,
+        TEMPLATE,
+        resolution=resolution,
+        cache=RenderCache(2**30, sizeof=len),
+        render_mode=render_mode,
+    )
+
+    html = controller.submit_parameters()
+    counters = [dict(m.stage_counter) for m in drawing]
+    for counter in counters:
+        assert counter
+        assert set(counter.values()) == {1}
+    if render_mode in ("vector", "raster"):
+        assert all("trajectory" in counter for counter in counters)
+    if animate:
+        assert all("circle_frames" in counter for counter in counters)
+
+    assert controller.submit_parameters() == html
+    assert [dict(m.stage_counter) for m in drawing] == counters
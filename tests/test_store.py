@@ -0,0 +1,59 @@
+import os
+import time
+
+import pytest
+
+from src.motions import CircleMotion
+from src.shapes import Circle
+from src.store import TrajectoryStore
+
+
+def motion(radius: float) -> CircleMotion:
+    """Motion with a trajectory of about 64 KB."""
+    return CircleMotion(Circle(96, 0), Circle(radius, 0), 5, False, 2000)
+
+
+def test_stale_temporary_directories_are_removed(tmp_path):
+    store = TrajectoryStore(tmp_path, 2**30, stale_seconds=600)
+    stale, fresh = tmp_path / ".tmp-crashed", tmp_path / ".tmp-writing"
+    for directory in (stale, fresh):
+        directory.mkdir()
+        (directory / "x.npy").write_bytes(bytes(1000))
+    hour_ago = time.time() - 3600
+    os.utime(stale, (hour_ago, hour_ago))
+
+    store.save(motion(23))
+
+    assert not stale.exists()
+    assert fresh.exists()
+    # Directories being written are counted in the size of the store
+    stored = sum(f.stat().st_size for f in tmp_path.glob("[!.]*/*"))
+    assert store.size == stored + 1000
+
+
+def test_store_is_scanned_only_over_the_limit(tmp_path, monkeypatch):
+    store = TrajectoryStore(tmp_path, 3 * 70000, rescan_seconds=3600)
+    scans = []
+    evict = store.evict
+    monkeypatch.setattr(store, "evict", lambda: scans.append(1) or evict())
+
+    for radius in (11, 13, 17, 19, 23):
+        store.save(motion(radius))
+
+    # The first save scans the store, and then every save over the limit
+    assert len(scans) == 3
+    assert store.size <= store.max_bytes
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+@pytest.mark.parametrize("rescan_seconds", [0, 3600])
+def test_rescan_counts_files_of_other_processes(tmp_path, rescan_seconds):
+    store = TrajectoryStore(tmp_path, 2**30, rescan_seconds=rescan_seconds)
+    other = TrajectoryStore(tmp_path, 2**30)
+    store.save(motion(11))
+    other.save(motion(13))
+
+    store.save(motion(17))
+
+    stored = sum(f.stat().st_size for f in tmp_path.glob("*/*"))
+    assert (store.size == stored) == (rescan_seconds == 0)
@@ -0,0 +1,45 @@
+import re
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.controllers import DrawController
+from src.motions import CircleMotion
+from src.shapes import Circle
+from src.svg_export import SvgExporter
+
+TEMPLATE = str(
+    Path(__file__).parent.parent / "src" / "html_views" / "plots.html"
+)
+
+
+def path_points(svg: str) -> np.ndarray:
+    """Absolute coordinates (in units of the viewBox) of the points of the last path."""
+    d = re.findall(r'd="([^"]*)"', svg)[-1]
+    numbers = np.array(re.findall(r"-?\d+", d), dtype=float).reshape(-1, 2)
+    return np.cumsum(numbers, axis=0)
+
+
+@pytest.mark.parametrize("scale", [0.01, 1, 100])
+def test_quantization_follows_plot_scale(scale):
+    orbit = Circle(1 * scale, 0)
+    motion = CircleMotion(
+        orbit, Circle(0.3 * scale, 0), 0.1 * scale, False, quality=500
+    )
+    controller = DrawController(orbit, [motion], 200, False, False, TEMPLATE)
+    exporter = SvgExporter(controller, resolution=1000)
+
+    svg = StringIO()
+    exporter.write(svg)
+    points = path_points(svg.getvalue()) / exporter.scale
+    points[:, 1] *= -1
+
+    x_range, _ = controller.get_ranges()
+    pixel = (x_range[1] - x_range[0]) / 1000
+    # Every written point is within a pixel of the drawing, and steps of a pixel are kept
+    exact = np.column_stack((motion.x, motion.y))
+    distances = np.linalg.norm(points[:, None] - exact[None], axis=2).min(1)
+    assert distances.max() <= pixel
+    assert len(points) > len(exact) / 2
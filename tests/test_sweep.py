@@ -0,0 +1,48 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from src.shapes import Circle, Elipse
+from src.sweep import ParameterSweep
+
+
+def sweep(orbit, radius_steps: int, pen_steps: int) -> ParameterSweep:
+    """Computed sweep of the orbit."""
+    result = ParameterSweep(
+        orbit,
+        np.linspace(20, 200, radius_steps),
+        np.linspace(0.25, 1, pen_steps),
+    )
+    result.compute()
+    return result
+
+
+@pytest.mark.parametrize("batch_size", [1, 8])
+def test_contact_sheet_bands_match_one_pass(batch_size):
+    ellipse_sweep = sweep(Elipse(400, 250, 0), 4, 5)
+
+    whole = ellipse_sweep.contact_sheet(0xFF7F0E, tile=64, batch_size=10**9)
+    bands = ellipse_sweep.contact_sheet(
+        0xFF7F0E, tile=64, batch_size=batch_size
+    )
+
+    # Bands differ from one pass only by float32 rounding of pixel coordinates
+    difference = np.abs(bands.alpha - whole.alpha)
+    assert difference.max() < 0.02
+    assert difference.mean() < 1e-4
+    np.testing.assert_array_equal(
+        bands.to_rgba()[..., :3], whole.to_rgba()[..., :3]
+    )
+
+
+def test_contact_sheet_memory_is_bounded():
+    circle_sweep = sweep(Circle(400, 0), 10, 20)
+
+    tracemalloc.start()
+    sheet = circle_sweep.contact_sheet(0xFF7F0E)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    image = sheet.rgb.nbytes + sheet.alpha.nbytes
+    assert peak < image + 64 * 2**20